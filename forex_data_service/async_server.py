@@ -0,0 +1,84 @@
+"""Asyncio serving mode for forex_data_service.
+
+Serves the same endpoints as server.py under uvicorn:
+
+    python forex_data_service/async_server.py
+
+The Flask routes are mounted through a WSGI bridge, so every blocking
+handler (upstream downloads, pandas work) runs on a worker thread and never
+blocks the event loop. The price stream is served natively as a coroutine,
+so idle streaming clients cost a queue each rather than a thread.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Mount, Route
+
+import server
+from price_stream import AsyncSubscription, format_sse
+
+# Threads available to blocking handlers (the WSGI bridge and the stream
+# snapshot each get this many); bounds concurrent upstream fetches
+ASYNC_WORKER_THREADS = int(os.environ.get('ASYNC_WORKER_THREADS', 64))
+
+
+async def stream_forex_price(request):
+    """Async twin of server.stream_forex_price with the same event format."""
+    pairs = request.query_params.get('pairs')
+    pairs_list = pairs.split(',') if pairs else server.all_known_symbols
+
+    server.start_background_tasks()
+    loop = asyncio.get_running_loop()
+    subscription = server.price_broadcaster.add(AsyncSubscription(pairs_list, loop))
+
+    async def generate():
+        try:
+            try:
+                snapshot = await anyio.to_thread.run_sync(server.price_cache.get_many, pairs_list)
+                yield format_sse(snapshot, event='snapshot')
+            except Exception as e:
+                print(f"Error building stream snapshot: {str(e)}")
+            while not subscription.closed:
+                try:
+                    update = await asyncio.wait_for(subscription.updates.get(), server.STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(update)
+        finally:
+            server.price_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        generate(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'Access-Control-Allow-Origin': '*'}
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = ASYNC_WORKER_THREADS
+    server.start_background_tasks()
+    yield
+    server.price_refresher.stop()
+    server.snapshot_writer.stop()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/stream/forex-price', stream_forex_price),
+        Mount('/', app=WSGIMiddleware(server.app, workers=ASYNC_WORKER_THREADS)),
+    ],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get("PORT", 5009))
+    uvicorn.run(app, host=os.environ.get('HOST', '127.0.0.1'), port=port)
@@ -0,0 +1,277 @@
+import fcntl
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Column layout of every stored series. Each column lives in its own raw
+# little-endian file so it can be memory-mapped and appended to in place.
+COLUMNS = [
+    ('time', np.dtype('<i8')),
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f8')),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+CHANGE_LOG_SIZE = 64  # Merges remembered per series (in changes.json) for incremental consumers
+
+
+def empty_bars():
+    """Returns a bar set with no rows."""
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+
+def frame_to_bars(frame):
+    """Converts a yfinance OHLCV frame into column arrays keyed by epoch-second time."""
+    if frame is None or frame.empty:
+        return empty_bars()
+
+    if isinstance(frame.columns, pd.MultiIndex):
+        # Single-ticker downloads come back as (Price, Ticker) or (Ticker, Price)
+        # columns depending on group_by; keep whichever level holds the prices
+        for level in range(frame.columns.nlevels):
+            if 'Close' in frame.columns.get_level_values(level):
+                frame = frame.copy()
+                frame.columns = frame.columns.get_level_values(level)
+                break
+
+    frame = frame.dropna(how='all', subset=[c for c in ['Open', 'High', 'Low', 'Close'] if c in frame.columns])
+    if frame.empty:
+        return empty_bars()
+
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    else:
+        index = index.tz_convert('UTC')
+    times = ((index - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+    bars = {'time': times}
+    for name, dtype in COLUMNS[1:]:
+        source = name.capitalize()
+        if source in frame.columns:
+            bars[name] = frame[source].to_numpy(dtype=dtype, na_value=np.nan)
+        else:
+            bars[name] = np.full(len(times), np.nan, dtype=dtype)
+
+    # yfinance occasionally repeats the forming bar; keep the latest copy
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    keep = np.append(times[1:] != times[:-1], True)
+    return {name: values[order][keep] for name, values in bars.items()}
+
+
+class _SeriesLock:
+    """Reentrant lock over one series, held against other threads and processes.
+
+    Threads queue on an RLock; the outermost holder also takes an flock on the
+    series' lock file so other workers sharing the store wait as well. The
+    file is opened per acquisition so forked workers never share a lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            if self._depth == 0:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except OSError:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+            self._depth += 1
+        except Exception:
+            self._lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            os.close(self._fd)  # Closing the only descriptor releases the flock
+            self._fd = None
+        self._lock.release()
+
+
+class BarStore:
+    """Append-only on-disk OHLCV store, one directory per symbol and interval.
+
+    Every read and merge holds the series lock, which also excludes other
+    processes, so several workers can share one store directory.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, symbol, interval):
+        """Returns the lock guarding a single series across threads and processes."""
+        key = (symbol, interval)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = _SeriesLock(os.path.join(self._series_dir(symbol, interval), '.lock'))
+            return self._locks[key]
+
+    def version(self, symbol, interval):
+        """Counter bumped on every merge into a series, kept on disk so all processes agree."""
+        return self._read_changes(symbol, interval)['version']
+
+    def changed_from(self, symbol, interval, since_version):
+        """Earliest bar time touched by merges after since_version.
+
+        Returns None when nothing changed, or -1 when the change log no longer
+        reaches back that far and the whole series must be treated as changed.
+        """
+        log = self._read_changes(symbol, interval)
+        if log['version'] == since_version:
+            return None
+        changes = [t for v, t in log['changes'] if v > since_version]
+        if since_version > log['version'] or len(changes) < log['version'] - since_version:
+            return -1
+        return min(changes)
+
+    def _series_dir(self, symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9_.-]', '_', symbol)
+        return os.path.join(self.root, safe_symbol, interval)
+
+    def _column_path(self, symbol, interval, name):
+        return os.path.join(self._series_dir(symbol, interval), f'{name}.bin')
+
+    def _map_column(self, symbol, interval, name, dtype):
+        path = self._column_path(symbol, interval, name)
+        if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(os.path.getsize(path) // dtype.itemsize,))
+
+    def _column_lengths(self, symbol, interval):
+        lengths = []
+        for name, dtype in COLUMNS:
+            path = self._column_path(symbol, interval, name)
+            lengths.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+        return lengths
+
+    def length(self, symbol, interval):
+        """Number of complete bars stored for a series (rows present in every column)."""
+        return min(self._column_lengths(symbol, interval))
+
+    def read(self, symbol, interval, start=None, end=None):
+        """Reads bars with start <= time < end (epoch seconds) as in-memory arrays."""
+        with self.lock(symbol, interval):
+            times = self._map_column(symbol, interval, 'time', COLUMNS[0][1])[:self._checked_length(symbol, interval)]
+            if len(times) == 0:
+                return empty_bars()
+            lo = int(np.searchsorted(times, start, side='left')) if start is not None else 0
+            hi = int(np.searchsorted(times, end, side='left')) if end is not None else len(times)
+            # Copy the window out of the maps so callers never hold a view into
+            # a file that a later merge may truncate.
+            bars = {'time': np.array(times[lo:hi])}
+            for name, dtype in COLUMNS[1:]:
+                bars[name] = np.array(self._map_column(symbol, interval, name, dtype)[lo:hi])
+            return bars
+
+    def last_time(self, symbol, interval):
+        """Timestamp of the newest stored bar, or None."""
+        with self.lock(symbol, interval):
+            times = self._map_column(symbol, interval, 'time', COLUMNS[0][1])[:self._checked_length(symbol, interval)]
+            return int(times[-1]) if len(times) else None
+
+    def _checked_length(self, symbol, interval):
+        """Series length, cut to the shortest column if an interrupted write left them uneven."""
+        lengths = self._column_lengths(symbol, interval)
+        if len(set(lengths)) > 1:
+            print(f"Column lengths differ for {symbol} ({interval}); using the first {min(lengths)} bars")
+        return min(lengths)
+
+    def read_meta(self, symbol, interval):
+        """Returns the coverage metadata for a series."""
+        path = os.path.join(self._series_dir(symbol, interval), 'meta.json')
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_meta(self, symbol, interval, meta):
+        directory = self._series_dir(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f'meta.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+    def merge(self, symbol, interval, bars):
+        """Merges fetched bars into a series; fresh values win on overlapping timestamps."""
+        new_times = bars['time']
+        if len(new_times) == 0:
+            return
+
+        with self.lock(symbol, interval):
+            os.makedirs(self._series_dir(symbol, interval), exist_ok=True)
+            self._record_change(symbol, interval, int(new_times[0]))
+            count = self._checked_length(symbol, interval)
+            times = self._map_column(symbol, interval, 'time', COLUMNS[0][1])[:count]
+
+            if count == 0 or new_times[0] > times[-1]:
+                del times
+                self._append(symbol, interval, bars, count)
+            elif new_times[0] >= times[0] and new_times[-1] >= times[-1]:
+                # Overlaps the tail only: drop the stale tail and append
+                cut = int(np.searchsorted(times, new_times[0], side='left'))
+                del times
+                self._append(symbol, interval, bars, cut)
+            else:
+                # Back-fill before the head or into the middle: rewrite the series
+                del times
+                self._rewrite(symbol, interval, bars)
+
+    def _read_changes(self, symbol, interval):
+        path = os.path.join(self._series_dir(symbol, interval), 'changes.json')
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'version': 0, 'changes': []}
+
+    def _record_change(self, symbol, interval, from_time):
+        log = self._read_changes(symbol, interval)
+        log['version'] += 1
+        log['changes'] = (log['changes'] + [[log['version'], from_time]])[-CHANGE_LOG_SIZE:]
+        path = os.path.join(self._series_dir(symbol, interval), 'changes.json')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(log, f)
+        os.replace(tmp_path, path)
+
+    def _append(self, symbol, interval, bars, keep):
+        for name, dtype in COLUMNS:
+            path = self._column_path(symbol, interval, name)
+            with open(path, 'ab') as f:
+                f.truncate(keep * dtype.itemsize)
+                f.write(np.ascontiguousarray(bars[name], dtype=dtype).tobytes())
+
+    def _rewrite(self, symbol, interval, bars):
+        stored = self.read(symbol, interval)
+        combined_times = np.concatenate([bars['time'], stored['time']])
+        # np.unique keeps the first occurrence, so fetched bars take precedence
+        _, first = np.unique(combined_times, return_index=True)
+        for name, dtype in COLUMNS:
+            values = np.concatenate([bars[name], stored[name]])[first].astype(dtype)
+            path = self._column_path(symbol, interval, name)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(values.tobytes())
+            os.replace(tmp_path, path)
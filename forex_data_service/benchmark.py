@@ -0,0 +1,116 @@
+"""Load benchmark for forex_data_service.
+
+By default the service is started in-process on the offline replay provider
+with a throwaway bar store, so results don't depend on the network:
+
+    python forex_data_service/benchmark.py --concurrency 32 --requests 500 --latency-ms 300
+
+Pass --url to benchmark an already running service instead.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SCENARIOS = [
+    ('forex-data', '/api/forex-data?pair=EUR/USD&timeframe=1h'),
+    ('forex-data 4h', '/api/forex-data?pair=GBP/USD&timeframe=4h'),
+    ('bulk-forex-data', '/api/bulk-forex-data?pairs=EUR/USD,GBP/USD,USD/JPY,AUD/USD,XAU/USD&timeframe=15m'),
+    ('bulk-forex-price', '/api/bulk-forex-price'),
+]
+
+
+def start_local_server(latency_ms, fixture_dir):
+    """Starts the app on an ephemeral port against the replay provider; returns its base URL."""
+    os.environ['MARKET_DATA_PROVIDER'] = 'replay'
+    os.environ['REPLAY_LATENCY_MS'] = str(latency_ms)
+    os.environ['BAR_STORE_DIR'] = tempfile.mkdtemp(prefix='forex-bench-')
+    if fixture_dir:
+        os.environ['REPLAY_FIXTURE_DIR'] = fixture_dir
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from werkzeug.serving import make_server
+    import server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{httpd.server_port}'
+
+
+def timed_get(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            size = len(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        size, status = 0, e.code
+    except Exception:
+        size, status = 0, None
+    return time.perf_counter() - started, status, size
+
+
+def run_scenario(base_url, path, requests, concurrency):
+    """Fires `requests` GETs with `concurrency` workers; the first request is timed separately as cold."""
+    url = base_url + path
+    cold_latency, _, _ = timed_get(url)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: timed_get(url), range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([r[0] for r in results]) * 1000.0
+    return {
+        'requests': requests,
+        'errors': sum(1 for r in results if r[1] != 200),
+        'throughput_rps': requests / elapsed,
+        'cold_ms': cold_latency * 1000.0,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'avg_bytes': float(np.mean([r[2] for r in results])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Benchmark a running service at this base URL')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=250.0, help='Simulated upstream latency (replay only)')
+    parser.add_argument('--fixture-dir', help='Bar store with recorded series for the replay provider')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    base_url = args.url or start_local_server(args.latency_ms, args.fixture_dir)
+
+    results = {}
+    for name, path in SCENARIOS:
+        results[name] = run_scenario(base_url, path, args.requests, args.concurrency)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<18} {'rps':>8} {'cold':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>7} {'bytes':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<18} {r['throughput_rps']:>8.1f} {r['cold_ms']:>7.1f}ms {r['p50_ms']:>6.1f}ms "
+            f"{r['p95_ms']:>6.1f}ms {r['p99_ms']:>6.1f}ms {r['max_ms']:>6.1f}ms {r['errors']:>7} {r['avg_bytes']:>9.0f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the breaker is open."""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Upstream unavailable; retrying in {retry_after:.0f}s.')
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Shared breaker for upstream calls with exponential backoff between probes.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail immediately. Once the backoff elapses a single probe call is let
+    through (half-open): success closes the circuit, failure reopens it with
+    the backoff doubled, up to ``max_backoff``. Jitter keeps worker processes
+    from probing in lockstep.
+    """
+
+    def __init__(self, failure_threshold=3, base_backoff=5.0, max_backoff=300.0, jitter=0.1):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self.retry_at = None
+        self.rejected = 0
+        self.last_error = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.time())
+
+    def _state(self, now):
+        if self.retry_at is None:
+            return 'closed'
+        return 'open' if now < self.retry_at or self._probing else 'half_open'
+
+    def call(self, fn, *args, **kwargs):
+        """Runs fn unless the circuit is open, recording the outcome."""
+        with self._lock:
+            now = time.time()
+            state = self._state(now)
+            if state == 'open':
+                self.rejected += 1
+                raise CircuitOpenError(max(0.0, self.retry_at - now) if self.retry_at else 0.0)
+            probe = state == 'half_open'
+            if probe:
+                self._probing = True
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e, probe)
+            raise
+        self._record_success()
+        return result
+
+    def _record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.trips = 0
+            self.opened_at = None
+            self.retry_at = None
+            self._probing = False
+
+    def _record_failure(self, error, probe):
+        with self._lock:
+            now = time.time()
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            self._probing = False
+            if probe or self.consecutive_failures >= self.failure_threshold:
+                self.trips += 1
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.trips - 1))
+                backoff *= 1.0 + random.uniform(-self.jitter, self.jitter)
+                if self.opened_at is None:
+                    self.opened_at = now
+                self.retry_at = now + backoff
+
+    def status(self):
+        with self._lock:
+            now = time.time()
+            return {
+                'state': self._state(now),
+                'consecutive_failures': self.consecutive_failures,
+                'trips': self.trips,
+                'opened_at': self.opened_at,
+                'retry_in_seconds': max(0.0, self.retry_at - now) if self.retry_at is not None else None,
+                'rejected': self.rejected,
+                'last_error': self.last_error,
+            }
+
+
+class GuardedProvider:
+    """Routes every upstream call of a market data provider through a circuit breaker.
+
+    Exceptions in ``answered_errors`` mean upstream responded (e.g. no data for
+    the requested symbols); they are re-raised to the caller but count as a
+    successful call, so bad client input can never open the circuit.
+    """
+
+    def __init__(self, provider, breaker, answered_errors=()):
+        self._provider = provider
+        self.breaker = breaker
+        self.answered_errors = answered_errors
+        self.name = provider.name
+
+    def _call(self, fn, *args, **kwargs):
+        def attempt():
+            try:
+                return fn(*args, **kwargs), None
+            except self.answered_errors as e:
+                return None, e
+
+        result, error = self.breaker.call(attempt)
+        if error is not None:
+            raise error
+        return result
+
+    def download(self, tickers, interval, **kwargs):
+        return self._call(self._provider.download, tickers, interval, **kwargs)
+
+    def ticker_info(self, ticker):
+        return self._call(self._provider.ticker_info, ticker)
+
+    def ticker_history(self, ticker, period, interval):
+        return self._call(self._provider.ticker_history, ticker, period, interval)
@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+
+FULL_RECOMPUTE_EVERY = 100  # Incremental updates before the running sums are rebuilt
+
+
+def align_closes(bars_by_pair, pairs):
+    """Closes of every pair on the union of their bar times, forward-filled across gaps."""
+    times = np.unique(np.concatenate([bars_by_pair[p]['time'] for p in pairs] + [np.empty(0, dtype=np.int64)]))
+    closes = np.full((len(times), len(pairs)), np.nan)
+    for column, pair in enumerate(pairs):
+        bars = bars_by_pair[pair]
+        closes[np.searchsorted(times, bars['time']), column] = bars['close']
+
+    # Forward fill: index of the last valid row at or before each row, per column
+    valid = ~np.isnan(closes)
+    last_valid = np.where(valid, np.arange(len(times))[:, None], 0)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    closes = closes[last_valid, np.arange(len(pairs))]
+    return times, closes
+
+
+def log_returns(times, closes):
+    """Per-bar log returns, dropping leading rows where any pair has no price yet."""
+    complete = np.flatnonzero(~np.isnan(closes).any(axis=1))
+    if len(complete) < 2:
+        return np.empty(0, dtype=np.int64), np.empty((0, closes.shape[1]))
+    closes = closes[complete[0]:]
+    return times[complete[0] + 1:], np.diff(np.log(closes), axis=0)
+
+
+def correlation_from_sums(count, sums, cross):
+    """Pearson correlation matrix from the row count, column sums and cross-product sums."""
+    mean = sums / count
+    covariance = cross / count - np.outer(mean, mean)
+    deviation = np.sqrt(np.clip(np.diag(covariance), 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        matrix = covariance / np.outer(deviation, deviation)
+    matrix[~np.isfinite(matrix)] = np.nan
+    np.fill_diagonal(matrix, np.where(deviation > 0, 1.0, np.nan))
+    return np.clip(matrix, -1.0, 1.0)
+
+
+class _Window:
+    def __init__(self, times, returns):
+        self.times = times
+        self.returns = returns
+        self.sums = returns.sum(axis=0)
+        self.cross = returns.T @ returns
+        self.updates = 0
+        self.matrix = correlation_from_sums(len(times), self.sums, self.cross) if len(times) else None
+
+
+class CorrelationTracker:
+    """Rolling correlation matrices keyed by (timeframe, lookback, pairs).
+
+    Each key keeps the returns window with its running sums. When new bars
+    arrive only the rows entering and leaving the window (and a revised
+    forming bar) are applied, instead of recomputing over the whole lookback.
+    """
+
+    def __init__(self):
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, times, returns, lookback):
+        """Brings the window for key up to date with the latest returns and returns (times, matrix)."""
+        times, returns = times[-lookback:], returns[-lookback:]
+        if not len(times):
+            return times, None
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.updates >= FULL_RECOMPUTE_EVERY:
+                window = self._windows[key] = _Window(times, returns)
+                return window.times, window.matrix
+
+            # Rows are kept only if their time is still in the window with identical returns
+            position = np.searchsorted(times, window.times).clip(0, len(times) - 1)
+            kept = (times[position] == window.times) & (returns[position] == window.returns).all(axis=1)
+            added = np.ones(len(times), dtype=bool)
+            added[position[kept]] = False
+            if not added.any() and kept.all():
+                return window.times, window.matrix
+            if added.sum() > len(times) // 2:
+                window = self._windows[key] = _Window(times, returns)
+                return window.times, window.matrix
+
+            removed_rows = window.returns[~kept]
+            added_rows = returns[added]
+            window.sums = window.sums + added_rows.sum(axis=0) - removed_rows.sum(axis=0)
+            window.cross = window.cross + added_rows.T @ added_rows - removed_rows.T @ removed_rows
+            window.times, window.returns = times, returns
+            window.updates += 1
+            window.matrix = correlation_from_sums(len(times), window.sums, window.cross)
+            return window.times, window.matrix
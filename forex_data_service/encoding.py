@@ -0,0 +1,79 @@
+import struct
+
+import numpy as np
+import pandas as pd
+
+from bar_store import COLUMNS, COLUMN_NAMES
+
+# Binary series layout (all little-endian):
+#   magic b'BARS', u8 version, u8 column count, u16 reserved, u32 row count,
+#   u32 reserved (16 bytes), then each column in COLUMN_NAMES order as a
+#   contiguous array (time: int64 epoch seconds, the rest: float64 with NaN
+#   for missing values), so every column starts on an 8-byte boundary.
+# A bulk payload is a u32 series count and u32 reserved followed, per series,
+# by a u16 name length, the UTF-8 pair name, NUL padding up to the next 8-byte
+# offset and one series block; clients can view the columns without copying.
+BINARY_MAGIC = b'BARS'
+BINARY_VERSION = 2
+BINARY_MIMETYPE = 'application/octet-stream'
+RESPONSE_FORMATS = ('records', 'columns', 'binary')
+_SERIES_HEADER = struct.Struct('<4sBBHII')
+_BULK_HEADER = struct.Struct('<II')
+ALIGNMENT = 8
+
+
+def bars_to_records(bars):
+    """Converts stored bars into the frontend's list-of-dicts format."""
+    data = pd.DataFrame(bars)
+    data['time'] = pd.to_datetime(data['time'], unit='s', utc=True).dt.strftime('%Y-%m-%d %H:%M:%S')
+    data = data[['time', 'open', 'high', 'low', 'close', 'volume']].astype(object)
+    # Replace NaN with None for JSON compatibility
+    data = data.where(data.notna(), None)
+    return data.to_dict(orient='records')
+
+
+def bars_to_columns(bars):
+    """Column arrays with epoch-second timestamps; one list per field instead of one dict per bar."""
+    columns = {'time': bars['time'].tolist()}
+    for name in COLUMN_NAMES[1:]:
+        values = bars[name]
+        missing = np.isnan(values)
+        if missing.any():
+            columns[name] = np.where(missing, None, values).tolist()
+        else:
+            columns[name] = values.tolist()
+    return columns
+
+
+def bars_to_binary(bars):
+    """Encodes a series straight from its NumPy buffers."""
+    count = len(bars['time'])
+    parts = [_SERIES_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(COLUMNS), 0, count, 0)]
+    for name, dtype in COLUMNS:
+        parts.append(np.ascontiguousarray(bars[name], dtype=dtype).tobytes())
+    return b''.join(parts)
+
+
+def bulk_to_binary(bars_by_pair):
+    """Encodes several named series into one payload."""
+    parts = [_BULK_HEADER.pack(len(bars_by_pair), 0)]
+    offset = _BULK_HEADER.size
+    for pair, bars in bars_by_pair.items():
+        name = pair.encode('utf-8')
+        offset += 2 + len(name)
+        padding = -offset % ALIGNMENT
+        block = bars_to_binary(bars)
+        parts.append(struct.pack('<H', len(name)) + name + b'\0' * padding)
+        parts.append(block)
+        offset += padding + len(block)
+    return b''.join(parts)
+
+
+def negotiate_format(args, headers):
+    """Picks the response format from ?format= or, failing that, the Accept header."""
+    requested = args.get('format')
+    if requested in RESPONSE_FORMATS:
+        return requested
+    if BINARY_MIMETYPE in headers.get('Accept', ''):
+        return 'binary'
+    return 'records'
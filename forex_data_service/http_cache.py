@@ -0,0 +1,31 @@
+import hashlib
+
+import numpy as np
+
+from bar_store import COLUMN_NAMES
+
+HISTORY_CACHE_CONTROL = 'public, no-cache'  # Storable, but always revalidated with the ETag
+
+
+def bars_etag(key_parts, bars_by_pair):
+    """Validator for a history response, built from the request key and each series' bounds.
+
+    Only the row count, first/last timestamps and the last bar's values are
+    hashed; they change whenever the served window or the forming bar does.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(key_parts).encode('utf-8'))
+    for pair, bars in bars_by_pair.items():
+        times = bars['time']
+        digest.update(pair.encode('utf-8'))
+        digest.update(np.int64(len(times)).tobytes())
+        if len(times):
+            digest.update(times[[0, -1]].tobytes())
+            digest.update(np.array([bars[name][-1] for name in COLUMN_NAMES[1:]], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def price_cache_control(fetched_at, ttl, now):
+    """Lets shared caches hold a price response until its oldest entry is due for refresh."""
+    max_age = max(0, int(ttl - (now - fetched_at))) if fetched_at is not None else 0
+    return f'public, max-age={max_age}'
@@ -0,0 +1,199 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class IncrementalIndicator:
+    """Indicator updated one bar at a time.
+
+    Appending a newer bar is O(1). Re-sending the latest bar (the forming
+    candle changed) rolls back to the state before it and re-applies, so the
+    result always matches a full recomputation over the same bars.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.last_time = None
+        self._before_last = None
+
+    def update(self, time, high, low, close):
+        if self.last_time is not None and time < self.last_time:
+            return
+        if time == self.last_time:
+            self._load(self._before_last)
+        else:
+            self._before_last = self._state()
+        self._apply(high, low, close)
+        self.last_time = time
+
+    def snapshot(self):
+        """JSON-serializable state, including what is needed to revise the latest bar."""
+        return {'period': self.period, 'last_time': self.last_time, 'state': self._state(), 'before_last': self._before_last}
+
+    def restore(self, snapshot):
+        self.period = snapshot['period']
+        self.last_time = snapshot['last_time']
+        self._before_last = snapshot['before_last']
+        self._load(snapshot['state'])
+
+
+class IncrementalEMA(IncrementalIndicator):
+    """EMA with alpha 2 / (period + 1), seeded with the first close."""
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.value = None
+
+    def _apply(self, high, low, close):
+        if self.value is None:
+            self.value = close
+        else:
+            self.value += 2.0 / (self.period + 1) * (close - self.value)
+
+    def _state(self):
+        return {'value': self.value}
+
+    def _load(self, state):
+        self.value = state['value']
+
+
+class IncrementalATR(IncrementalIndicator):
+    """Mean of the last `period` true ranges, kept as a running sum over a ring buffer."""
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.prev_close = None
+        self.ranges = deque(maxlen=period)
+        self.total = 0.0
+
+    @property
+    def value(self):
+        return self.total / self.period if len(self.ranges) == self.period else None
+
+    def _apply(self, high, low, close):
+        if self.prev_close is not None:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            if len(self.ranges) == self.period:
+                self.total -= self.ranges[0]
+            self.ranges.append(tr)
+            self.total += tr
+        self.prev_close = close
+
+    def _state(self):
+        return {'prev_close': self.prev_close, 'ranges': list(self.ranges), 'total': self.total}
+
+    def _load(self, state):
+        self.prev_close = state['prev_close']
+        self.ranges = deque(state['ranges'], maxlen=self.period)
+        self.total = state['total']
+
+
+class IncrementalRSI(IncrementalIndicator):
+    """Wilder's RSI from smoothed average gains and losses."""
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.prev_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.changes = 0
+
+    @property
+    def value(self):
+        if self.changes < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+    def _apply(self, high, low, close):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if self.avg_gain is None:
+                self.avg_gain, self.avg_loss = gain, loss
+            else:
+                self.avg_gain += (gain - self.avg_gain) / self.period
+                self.avg_loss += (loss - self.avg_loss) / self.period
+            self.changes += 1
+        self.prev_close = close
+
+    def _state(self):
+        return {'prev_close': self.prev_close, 'avg_gain': self.avg_gain, 'avg_loss': self.avg_loss, 'changes': self.changes}
+
+    def _load(self, state):
+        self.prev_close = state['prev_close']
+        self.avg_gain = state['avg_gain']
+        self.avg_loss = state['avg_loss']
+        self.changes = state['changes']
+
+
+class IndicatorState:
+    """The incremental indicators tracked for one symbol/timeframe."""
+
+    def __init__(self, atr_period, ema_period, rsi_period):
+        self.indicators = {
+            'atr': IncrementalATR(atr_period),
+            'ema': IncrementalEMA(ema_period),
+            'rsi': IncrementalRSI(rsi_period),
+        }
+        self.last_time = None
+
+    def sync(self, bars):
+        """Feeds only the bars at or after the last one seen; the first call warms up on all of them."""
+        times = bars['time']
+        start = int(np.searchsorted(times, self.last_time, side='left')) if self.last_time is not None else 0
+        high, low, close = bars['high'], bars['low'], bars['close']
+        for i in range(start, len(times)):
+            if np.isnan(close[i]):
+                continue
+            for indicator in self.indicators.values():
+                indicator.update(int(times[i]), float(high[i]), float(low[i]), float(close[i]))
+            self.last_time = int(times[i])
+
+    def values(self):
+        result = {name: indicator.value for name, indicator in self.indicators.items()}
+        result['last_time'] = self.last_time
+        return result
+
+    def snapshot(self):
+        return {
+            'last_time': self.last_time,
+            'indicators': {name: indicator.snapshot() for name, indicator in self.indicators.items()},
+        }
+
+    def restore(self, snapshot):
+        self.last_time = snapshot['last_time']
+        for name, state in snapshot['indicators'].items():
+            self.indicators[name].restore(state)
+
+
+class IndicatorStateRegistry:
+    """Incremental indicator states keyed by (symbol, timeframe, periods)."""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def sync(self, symbol, timeframe, periods, bars):
+        """Brings the state for a key up to date with bars and returns its latest values."""
+        key = (symbol, timeframe) + tuple(periods)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = IndicatorState(*periods)
+            state.sync(bars)
+            return state.values()
+
+    def snapshot(self):
+        with self._lock:
+            return [{'key': list(key), 'state': state.snapshot()} for key, state in self._states.items()]
+
+    def restore(self, snapshot):
+        with self._lock:
+            for item in snapshot:
+                key = tuple(item['key'])
+                state = IndicatorState(*key[2:])
+                state.restore(item['state'])
+                self._states[key] = state
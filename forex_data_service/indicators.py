@@ -0,0 +1,182 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PARAMS = {
+    'atr_period': 14,
+    'ema_period': 20,
+    'rsi_period': 14,
+    'swing_length': 5,
+    'swing_count': 5,
+    'level_tolerance': 0.001,
+    'level_count': 10,
+}
+# Parameters that must be greater than zero
+POSITIVE_PARAMS = ('atr_period', 'ema_period', 'rsi_period', 'swing_length', 'level_tolerance')
+# Inclusive bounds on how many swings and levels a response lists
+COUNT_LIMITS = {'swing_count': (1, 100), 'level_count': (0, 100)}
+MEMO_SIZE = 256  # Indicator results kept per process
+
+
+def invalid_params(params):
+    """Names of the given parameters that are out of range."""
+    invalid = [name for name in POSITIVE_PARAMS if name in params and not params[name] > 0]
+    return invalid + [
+        name for name, (lowest, highest) in COUNT_LIMITS.items()
+        if name in params and not lowest <= params[name] <= highest
+    ]
+
+
+def true_range(high, low, close):
+    """True range per bar; the first bar has no previous close and uses high - low."""
+    previous_close = np.r_[close[:1], close[:-1]]
+    return np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+
+
+def sma(values, period):
+    """Simple moving average via cumulative sums; NaN until the window fills."""
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        sums = np.cumsum(np.r_[0.0, values])
+        result[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return result
+
+
+def ema(values, period):
+    """Exponential moving average with alpha 2 / (period + 1), seeded with the first value."""
+    return pd.Series(values).ewm(alpha=2.0 / (period + 1), adjust=False).mean().to_numpy()
+
+
+def atr(high, low, close, period):
+    """Average true range as the simple mean of the last `period` true ranges.
+
+    The first bar has no previous close, so it is NaN and the result lines up with the input.
+    """
+    if len(close) < 2:
+        return np.full(len(close), np.nan)
+    return np.r_[np.nan, sma(true_range(high, low, close)[1:], period)]
+
+
+def rsi(close, period):
+    """Wilder's RSI."""
+    if len(close) < 2:
+        return np.full(len(close), np.nan)
+    change = np.diff(close)
+    gains = pd.Series(np.clip(change, 0, None)).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    losses = pd.Series(np.clip(-change, 0, None)).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(losses == 0, 100.0, 100.0 - 100.0 / (1.0 + gains / losses))
+    values[:period - 1] = np.nan
+    return np.r_[np.nan, values]
+
+
+def swing_points(values, length, highs=True):
+    """Indices of bars whose value is strictly beyond every bar within `length` on each side."""
+    if len(values) < 2 * length + 1:
+        return np.empty(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(values, 2 * length + 1)
+    center = windows[:, length]
+    if highs:
+        others = np.fmax(windows[:, :length].max(axis=1), windows[:, length + 1:].max(axis=1))
+        is_swing = center > others
+    else:
+        others = np.fmin(windows[:, :length].min(axis=1), windows[:, length + 1:].min(axis=1))
+        is_swing = center < others
+    return np.flatnonzero(is_swing) + length
+
+
+def support_resistance(high, low, tolerance, count):
+    """Clusters highs and lows into price levels `tolerance` wide and ranks them by touches."""
+    prices = np.r_[high, low]
+    is_resistance = np.r_[np.ones(len(high), dtype=bool), np.zeros(len(low), dtype=bool)]
+    valid = np.isfinite(prices) & (prices > 0)
+    prices, is_resistance = prices[valid], is_resistance[valid]
+    if len(prices) == 0:
+        return []
+
+    # Bins of constant relative width, so the tolerance behaves like a percentage
+    labels = np.floor(np.log(prices) / np.log1p(tolerance)).astype(np.int64)
+    _, inverse, touches = np.unique(labels, return_inverse=True, return_counts=True)
+    average = np.bincount(inverse, weights=prices) / touches
+    resistance_touches = np.bincount(inverse, weights=is_resistance)
+
+    significant = np.flatnonzero(touches >= 2)
+    ranked = significant[np.argsort(-touches[significant], kind='stable')][:count]
+    return [
+        {
+            'price': float(average[i]),
+            'type': 'Resistance' if resistance_touches[i] * 2 >= touches[i] else 'Support',
+            'touches': int(touches[i]),
+        }
+        for i in ranked
+    ]
+
+
+def _last(values):
+    return float(values[-1]) if len(values) and np.isfinite(values[-1]) else None
+
+
+def compute_indicators(bars, params, names, series_length=0):
+    """Computes the requested indicators over a bar set and returns a compact summary."""
+    high, low, close, times = bars['high'], bars['low'], bars['close'], bars['time']
+    result = {'bars': int(len(times)), 'last_time': int(times[-1]) if len(times) else None}
+    series = {}
+
+    if 'atr' in names:
+        values = atr(high, low, close, params['atr_period'])
+        result['atr'] = _last(values)
+        series['atr'] = values
+    if 'ema' in names:
+        values = ema(close, params['ema_period'])
+        result['ema'] = _last(values)
+        series['ema'] = values
+    if 'rsi' in names:
+        values = rsi(close, params['rsi_period'])
+        result['rsi'] = _last(values)
+        series['rsi'] = values
+    if 'swings' in names:
+        count = params['swing_count']
+        high_idx = swing_points(high, params['swing_length'], highs=True)[-count:]
+        low_idx = swing_points(low, params['swing_length'], highs=False)[-count:]
+        result['swings'] = {
+            'highs': [{'time': int(times[i]), 'price': float(high[i])} for i in high_idx],
+            'lows': [{'time': int(times[i]), 'price': float(low[i])} for i in low_idx],
+        }
+    if 'levels' in names:
+        result['levels'] = support_resistance(high, low, params['level_tolerance'], params['level_count'])
+
+    if series_length and series:
+        tail = slice(-series_length, None)
+        result['series'] = {'time': times[tail].tolist()}
+        for name, values in series.items():
+            values = values[tail]
+            result['series'][name] = np.where(np.isfinite(values), values, None).tolist()
+    return result
+
+
+class IndicatorCache:
+    """Memoizes indicator summaries per (symbol, timeframe, params, last bar)."""
+
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, bars, compute):
+        """Returns the memoized result for key and the current last bar, computing it on a miss."""
+        times = bars['time']
+        last_bar = (int(times[-1]), float(bars['close'][-1]), int(len(times))) if len(times) else None
+        full_key = (key, last_bar)
+        with self._lock:
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                return self._entries[full_key]
+
+        result = compute()
+        with self._lock:
+            self._entries[full_key] = result
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return result
@@ -0,0 +1,175 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds for latency histograms, from cache hits to slow upstream calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upper bounds in bytes for response-size histograms
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class CallbackCounter:
+    """Counter whose values are read from a callback returning {label value: count} at scrape time.
+
+    Used for counts that a component already keeps itself, such as cache lookups.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelname, callback):
+        self.name = name
+        self.help = help
+        self.labelname = labelname
+        self.callback = callback
+
+    def samples(self):
+        for value, count in sorted(self.callback().items()):
+            yield self.name, _format_labels((self.labelname,), (value,)), count
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label combination."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall time of the block, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                yield self.name + '_bucket', labels, cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format.
+
+    Each worker process keeps its own values; scrape every worker, or run a
+    single process, to see the full picture.
+    """
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(self.prefix + name, help, labelnames))
+
+    def callback_counter(self, name, help, labelname, callback):
+        return self._register(CallbackCounter(self.prefix + name, help, labelname, callback))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self.prefix + name, help, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class InstrumentedProvider:
+    """Wraps a market data provider, timing every upstream call and counting its failures."""
+
+    def __init__(self, provider, latency, errors):
+        self._provider = provider
+        self._latency = latency
+        self._errors = errors
+        self.name = provider.name
+
+    def _call(self, operation, fn, *args, **kwargs):
+        try:
+            with self._latency.time(provider=self.name, operation=operation):
+                return fn(*args, **kwargs)
+        except Exception:
+            self._errors.inc(provider=self.name, operation=operation)
+            raise
+
+    def download(self, tickers, interval, **kwargs):
+        return self._call('download', self._provider.download, tickers, interval, **kwargs)
+
+    def ticker_info(self, ticker):
+        return self._call('ticker_info', self._provider.ticker_info, ticker)
+
+    def ticker_history(self, ticker, period, interval):
+        return self._call('ticker_history', self._provider.ticker_history, ticker, period, interval)
@@ -0,0 +1,310 @@
+import threading
+import time
+
+
+class _Flight:
+    """A single in-progress refresh that any number of callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class PriceCache:
+    """Thread-safe per-symbol price cache with stale-while-revalidate and single-flight refreshes.
+
+    Each entry expires independently. Entries older than ``ttl`` are still
+    served for another ``stale_ttl`` seconds while a background refresh runs;
+    only entries past both windows (or never loaded) make the caller wait.
+    Concurrent misses for the same symbol share one call to ``loader``.
+
+    With a ``shared`` table (see shared_cache.SharedPriceTable) newer entries
+    loaded by other worker processes are picked up on lookup, and only the
+    process holding the table's writer lock revalidates stale entries and
+    publishes what it loads. Other workers still load true misses themselves.
+
+    Values for which ``is_failure`` returns True never replace a good entry;
+    the old value keeps being served (and aging) until a load succeeds.
+    """
+
+    def __init__(self, loader, ttl, stale_ttl, wait_timeout=30, shared=None, is_failure=None):
+        self._loader = loader
+        self._is_failure = is_failure or (lambda value: False)
+        self.shared = shared
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.wait_timeout = wait_timeout
+        self._entries = {}
+        self._inflight = {}
+        self._listeners = []
+        self.lookups = {'hit': 0, 'stale': 0, 'miss': 0}  # Per-symbol outcomes of get_cached
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Registers a callback invoked with every batch of freshly loaded values."""
+        self._listeners.append(listener)
+
+    def get_cached(self, pairs):
+        """Returns (servable values, pairs that need a blocking load) without waiting on upstream.
+
+        Stale entries are returned and revalidated in the background.
+        """
+        if self.shared is not None:
+            self._pull_shared(pairs)
+        now = time.time()
+        results, missing, stale = {}, [], []
+        with self._lock:
+            for pair in pairs:
+                entry = self._entries.get(pair)
+                if entry is None or now - entry[1] >= self.ttl + self.stale_ttl:
+                    missing.append(pair)
+                else:
+                    results[pair] = entry[0]
+                    if now - entry[1] >= self.ttl:
+                        stale.append(pair)
+            self.lookups['miss'] += len(missing)
+            self.lookups['stale'] += len(stale)
+            self.lookups['hit'] += len(results) - len(stale)
+
+        if stale and (self.shared is None or self.shared.is_writer()):
+            self.refresh(stale, wait=False)
+        return results, missing
+
+    def get_many(self, pairs):
+        """Returns cached values for the requested pairs, refreshing as needed."""
+        results, missing = self.get_cached(pairs)
+
+        if missing:
+            try:
+                self.refresh(missing, wait=True)
+            except Exception:
+                # Fall back to expired values when the refresh fails
+                if not results and not any(pair in self._entries for pair in missing):
+                    raise
+            with self._lock:
+                for pair in missing:
+                    if pair in self._entries:
+                        results[pair] = self._entries[pair][0]
+
+        return results
+
+    def fetched_at(self, pairs):
+        """Load time of the oldest cached entry among the given pairs, or None."""
+        with self._lock:
+            times = [self._entries[pair][1] for pair in pairs if pair in self._entries]
+        return min(times) if times else None
+
+    def _pull_shared(self, pairs):
+        """Copies entries that are newer in the shared table; returns the changed values."""
+        changed = {}
+        for pair in pairs:
+            entry = self.shared.get(pair)
+            if entry is None:
+                continue
+            with self._lock:
+                current = self._entries.get(pair)
+                if current is None or current[1] < entry[1]:
+                    self._entries[pair] = entry
+                    changed[pair] = entry[0]
+        return changed
+
+    def sync_shared(self, pairs):
+        """Pulls entries other workers loaded and notifies listeners, as a local refresh would."""
+        self._notify(self._pull_shared(pairs))
+
+    def _notify(self, values):
+        for listener in self._listeners:
+            try:
+                listener(values)
+            except Exception as e:
+                print(f"Error notifying price listener: {str(e)}")
+
+    def snapshot(self):
+        """Entries as [pair, value, fetched_at] lists for persisting across restarts."""
+        with self._lock:
+            return [[pair, value, fetched_at] for pair, (value, fetched_at) in self._entries.items()]
+
+    def restore(self, entries):
+        """Loads persisted entries, keeping their original load times so expiry still applies."""
+        with self._lock:
+            for pair, value, fetched_at in entries:
+                current = self._entries.get(pair)
+                if current is None or current[1] < fetched_at:
+                    self._entries[pair] = (value, fetched_at)
+
+    def refresh(self, pairs, wait=True):
+        """Reloads the given pairs, joining any refresh already in flight for them."""
+        with self._lock:
+            flights = {self._inflight[pair] for pair in pairs if pair in self._inflight}
+            to_load = [pair for pair in dict.fromkeys(pairs) if pair not in self._inflight]
+            if to_load:
+                flight = _Flight()
+                for pair in to_load:
+                    self._inflight[pair] = flight
+                flights.add(flight)
+
+        if to_load:
+            if wait:
+                self._run(flight, to_load)
+            else:
+                threading.Thread(target=self._run, args=(flight, to_load), daemon=True).start()
+
+        if wait:
+            for pending in flights:
+                if not pending.done.wait(self.wait_timeout):
+                    raise TimeoutError('Timed out waiting for price refresh.')
+                if pending.error is not None:
+                    raise pending.error
+
+    def _run(self, flight, pairs):
+        try:
+            loaded = self._loader(pairs)
+            fetched_at = time.time()
+            values = {}
+            with self._lock:
+                for pair, value in loaded.items():
+                    entry = self._entries.get(pair)
+                    if self._is_failure(value) and entry is not None and not self._is_failure(entry[0]):
+                        continue
+                    self._entries[pair] = (value, fetched_at)
+                    values[pair] = value
+            if self.shared is not None and self.shared.is_writer():
+                for pair, value in values.items():
+                    self.shared.put(pair, value, fetched_at)
+            self._notify(values)
+        except Exception as e:
+            print(f"Error refreshing prices for {', '.join(pairs)}: {str(e)}")
+            flight.error = e
+        finally:
+            with self._lock:
+                for pair in pairs:
+                    if self._inflight.get(pair) is flight:
+                        del self._inflight[pair]
+            flight.done.set()
+
+
+class _Batch:
+    def __init__(self):
+        self.pairs = set()
+        self.done = threading.Event()
+        self.results = {}
+        self.error = None
+
+
+class PriceBatcher:
+    """Collects single-symbol lookups for a short window and resolves them with one cache load.
+
+    Warm cache entries are answered immediately; only misses wait for the
+    window to close, so latency stays bounded by ``window`` plus one download.
+    """
+
+    def __init__(self, cache, window, wait_timeout=30):
+        self.cache = cache
+        self.window = window
+        self.wait_timeout = wait_timeout
+        self._batch = None
+        self._lock = threading.Lock()
+
+    def get(self, pair):
+        """Returns the cached value for a pair, or None if it could not be loaded."""
+        results, missing = self.cache.get_cached([pair])
+        if not missing:
+            return results[pair]
+
+        with self._lock:
+            batch = self._batch
+            if batch is None:
+                batch = self._batch = _Batch()
+                threading.Timer(self.window, self._flush, args=(batch,)).start()
+            batch.pairs.add(pair)
+
+        if not batch.done.wait(self.wait_timeout):
+            raise TimeoutError('Timed out waiting for batched price lookup.')
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(pair)
+
+    def _flush(self, batch):
+        with self._lock:
+            if self._batch is batch:
+                self._batch = None
+        try:
+            batch.results = self.cache.get_many(sorted(batch.pairs))
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+
+class PriceRefresher:
+    """Background thread that refreshes a PriceCache ahead of expiry.
+
+    ``pairs`` is either a list or a callable returning the pairs to refresh.
+    When the cache has a shared table, only the worker holding its writer lock
+    refreshes; the others stand by, pulling its results every
+    ``standby_interval`` seconds so their stream subscribers still get updates.
+    """
+
+    def __init__(self, cache, pairs, interval, standby_interval=1.0):
+        self.cache = cache
+        self.pairs = pairs
+        self.interval = interval
+        self.standby_interval = standby_interval
+        self.standby = False
+        self.last_attempt = None
+        self.last_success = None
+        self.last_error = None
+        self.consecutive_failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the refresh loop; a no-op while it is running (threads do not survive a fork)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name='price-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh_once(self):
+        pairs = self.pairs() if callable(self.pairs) else self.pairs
+        shared = self.cache.shared
+        self.standby = shared is not None and not shared.is_writer()
+        if self.standby:
+            self.cache.sync_shared(pairs)
+            return
+        self.last_attempt = time.time()
+        try:
+            self.cache.refresh(pairs, wait=True)
+            self.last_success = time.time()
+            self.last_error = None
+            self.consecutive_failures = 0
+        except Exception as e:
+            self.last_error = str(e)
+            self.consecutive_failures += 1
+
+    def _loop(self):
+        while not self._stop.is_set():
+            started = time.time()
+            self.refresh_once()
+            interval = self.standby_interval if self.standby else self.interval
+            self._stop.wait(max(0, interval - (time.time() - started)))
+
+    def status(self):
+        """Refresh health for monitoring; lag is the age of the last successful refresh."""
+        now = time.time()
+        lag = now - self.last_success if self.last_success is not None else None
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'standby': self.standby,
+            'interval_seconds': self.interval,
+            'last_attempt': self.last_attempt,
+            'last_success': self.last_success,
+            'last_error': self.last_error,
+            'consecutive_failures': self.consecutive_failures,
+            'lag_seconds': lag,
+            # A standby worker's freshness is the writer's to report
+            'behind': not self.standby and (lag is None or lag > 2 * self.interval),
+        }
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import queue
+import threading
+
+SUBSCRIBER_QUEUE_SIZE = 100  # Updates buffered per client before it is dropped
+
+
+class Subscription:
+    """A client's set of symbols and the queue of changed prices waiting for it."""
+
+    def __init__(self, pairs):
+        self.pairs = set(pairs)
+        self.updates = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def offer(self, update):
+        """Queues an update without blocking; returns False if the client has fallen too far behind."""
+        try:
+            self.updates.put_nowait(update)
+            return True
+        except queue.Full:
+            return False
+
+
+class AsyncSubscription(Subscription):
+    """Subscription consumed by a coroutine; updates are handed to its event loop thread-safely."""
+
+    def __init__(self, pairs, loop):
+        self.pairs = set(pairs)
+        self.updates = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+        self._loop = loop
+
+    def offer(self, update):
+        if self.updates.qsize() >= SUBSCRIBER_QUEUE_SIZE:
+            return False
+        try:
+            self._loop.call_soon_threadsafe(self._put, update)
+        except RuntimeError:
+            # The event loop has shut down
+            return False
+        return True
+
+    def _put(self, update):
+        try:
+            self.updates.put_nowait(update)
+        except asyncio.QueueFull:
+            self.closed = True
+
+
+class PriceBroadcaster:
+    """Fans refreshed prices out to stream subscribers, forwarding only values that changed."""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._last_published = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, pairs):
+        return self.add(Subscription(pairs))
+
+    def add(self, subscription):
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscribed_pairs(self):
+        """Union of the symbols that any connected client is watching."""
+        with self._lock:
+            return set().union(*(s.pairs for s in self._subscriptions))
+
+    def publish(self, values):
+        """Receives freshly loaded prices and queues the changed ones for interested clients."""
+        with self._lock:
+            changed = {pair: value for pair, value in values.items() if self._last_published.get(pair) != value}
+            self._last_published.update(changed)
+            subscriptions = list(self._subscriptions)
+
+        if not changed:
+            return
+
+        for subscription in subscriptions:
+            update = {pair: value for pair, value in changed.items() if pair in subscription.pairs}
+            if not update:
+                continue
+            if not subscription.offer(update):
+                # A client this far behind is gone or stuck; make it reconnect
+                subscription.closed = True
+                self.unsubscribe(subscription)
+
+
+def format_sse(data, event=None):
+    """Encodes one server-sent event."""
+    message = f"event: {event}\n" if event else ''
+    return message + f"data: {json.dumps(data)}\n\n"
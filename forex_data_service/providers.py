@@ -0,0 +1,214 @@
+import os
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+
+# Bar length per interval, used to lay synthetic bars on a grid
+INTERVAL_SECONDS = {
+    '1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600, '90m': 5400,
+    '1h': 3600, '1d': 86400, '5d': 5 * 86400, '1wk': 7 * 86400, '1mo': 30 * 86400, '3mo': 90 * 86400,
+}
+PERIOD_SECONDS = {
+    '1d': 86400, '5d': 5 * 86400, '7d': 7 * 86400, '1mo': 30 * 86400, '3mo': 90 * 86400,
+}
+# Longest start/end span Yahoo accepts in one request
+MAX_REQUEST_SECONDS = {'1m': 7 * 86400}
+
+
+# Substrings of yfinance's per-ticker errors that mean the request itself failed
+# (network, HTTP or rate limiting) rather than the ticker having no data
+TRANSPORT_ERROR_MARKERS = (
+    'rate limit', 'too many requests', 'timed out', 'timeout', 'connection', 'curl', 'ssl',
+    'http error 5', 'http error 429', 'http error 401', 'http error 403',
+)
+
+
+class UpstreamError(Exception):
+    """Raised when yfinance reports a failed request for every ticker without raising."""
+
+
+class NoDataError(Exception):
+    """Raised when upstream answered but had no bars for any requested ticker.
+
+    This is a property of the tickers (unknown symbol, empty range), not an
+    outage, so it must not count against the circuit breaker.
+    """
+
+
+class YFinanceProvider:
+    """Live market data from Yahoo Finance."""
+
+    name = 'yfinance'
+
+    def __init__(self):
+        import yfinance as yf
+        self._yf = yf
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        """Multi-ticker OHLCV download; columns are grouped by ticker.
+
+        Ranges longer than Yahoo allows for the interval are fetched in chunks.
+        yfinance reports per-ticker failures without raising, so when none of the
+        tickers came back with bars this raises UpstreamError if the request
+        failed in transit, or NoDataError if upstream simply had nothing.
+        """
+        span = MAX_REQUEST_SECONDS.get(interval)
+        if period is None and span is not None:
+            start_ts = _to_epoch(start)
+            end_ts = _to_epoch(end) if end is not None else int(time.time())
+            if end_ts - start_ts > span:
+                chunks = [
+                    self._download(
+                        tickers, interval,
+                        start=pd.Timestamp(chunk_start, unit='s', tz='UTC'),
+                        end=pd.Timestamp(min(chunk_start + span, end_ts), unit='s', tz='UTC'),
+                        auto_adjust=auto_adjust
+                    )
+                    for chunk_start in range(start_ts, end_ts, span)
+                ]
+                chunks = [chunk for chunk in chunks if not chunk.empty]
+                data = pd.concat(chunks) if chunks else pd.DataFrame()
+                data = data[~data.index.duplicated(keep='last')]
+                self._check_returned(tickers, data)
+                return data
+
+        data = self._download(tickers, interval, start=start, end=end, period=period, auto_adjust=auto_adjust)
+        self._check_returned(tickers, data)
+        return data
+
+    def _download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        params = {'interval': interval}
+        if period is not None:
+            params['period'] = period
+        else:
+            params['start'] = start
+            params['end'] = end
+        return self._yf.download(
+            tickers=tickers if len(tickers) > 1 else tickers[0],
+            **params,
+            group_by='ticker',
+            auto_adjust=auto_adjust,
+            threads=True,
+            progress=False
+        )
+
+    def _check_returned(self, tickers, data):
+        for ticker in tickers:
+            frame = _ticker_frame(data, ticker, len(tickers))
+            if frame is not None and not frame.dropna(how='all').empty:
+                return
+        errors = getattr(getattr(self._yf, 'shared', None), '_ERRORS', None) or {}
+        messages = [str(errors[ticker]) for ticker in tickers if ticker in errors]
+        details = '; '.join(f'{ticker}: {errors[ticker]}' for ticker in tickers if ticker in errors)
+        message = f"No data returned for {', '.join(tickers)}" + (f' ({details})' if details else '')
+        if any(marker in text.lower() for text in messages for marker in TRANSPORT_ERROR_MARKERS):
+            raise UpstreamError(message)
+        raise NoDataError(message)
+
+    def ticker_info(self, ticker):
+        return self._yf.Ticker(ticker).info
+
+    def ticker_history(self, ticker, period, interval):
+        return self._yf.Ticker(ticker).history(period=period, interval=interval)
+
+
+class ReplayProvider:
+    """Deterministic offline provider for load tests and benchmarks.
+
+    Series recorded into a bar store under ``fixture_dir`` are replayed as-is;
+    any other ticker gets a synthetic random-walk-like series that depends only
+    on the ticker and bar time, so overlapping requests always agree.
+    ``latency`` seconds are slept per call to simulate the upstream round trip.
+    """
+
+    name = 'replay'
+
+    def __init__(self, fixture_dir=None, latency=0.0):
+        self.fixtures = BarStore(fixture_dir) if fixture_dir else None
+        self.latency = latency
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        if self.latency:
+            time.sleep(self.latency)
+        end_ts = _to_epoch(end) if end is not None else int(time.time())
+        start_ts = _to_epoch(start) if period is None else end_ts - PERIOD_SECONDS.get(period, 7 * 86400)
+        frames = {ticker: self._frame(ticker, interval, start_ts, end_ts) for ticker in tickers}
+        return pd.concat(frames, axis=1)
+
+    def ticker_info(self, ticker):
+        frame = self.download([ticker], '1m', period='1d')[ticker]
+        closes = frame['Close'].dropna()
+        return {'regularMarketPrice': float(closes.iloc[-1])} if len(closes) else {}
+
+    def ticker_history(self, ticker, period, interval):
+        return self.download([ticker], interval, period=period)[ticker]
+
+    def _frame(self, ticker, interval, start, end):
+        if self.fixtures is not None and self.fixtures.length(ticker, interval):
+            bars = self.fixtures.read(ticker, interval, start, end)
+        else:
+            bars = synthetic_bars(ticker, interval, start, end)
+        index = pd.DatetimeIndex(pd.to_datetime(bars['time'], unit='s', utc=True), name='Datetime')
+        return pd.DataFrame({
+            'Open': bars['open'],
+            'High': bars['high'],
+            'Low': bars['low'],
+            'Close': bars['close'],
+            'Adj Close': bars['close'],
+            'Volume': bars['volume'],
+        }, index=index)
+
+
+def synthetic_bars(ticker, interval, start, end):
+    """Deterministic OHLCV bars on the interval grid covering [start, end)."""
+    step = INTERVAL_SECONDS.get(interval, 3600)
+    first = start - start % step + (step if start % step else 0)
+    times = np.arange(first, end, step, dtype=np.int64)
+    seed = zlib.crc32(ticker.encode('utf-8')) % 10000
+
+    base = 1.0 + seed / 10000.0
+    # Layered sines give trends and swings; the hashed term adds bar-level noise
+    t = times.astype(np.float64)
+    drift = 0.02 * np.sin(t / 86400.0 / 3.0 + seed) + 0.005 * np.sin(t / 3600.0 / 5.0 + seed)
+    noise = np.modf(np.abs(np.sin(t * 12.9898 + seed) * 43758.5453))[0] - 0.5
+    close = base * (1.0 + drift + 0.0005 * noise)
+    open_ = np.r_[close[:1], close[:-1]] if len(close) else close
+    wick = base * 0.0003 * (1.0 + np.abs(noise))
+    return {
+        'time': times,
+        'open': open_,
+        'high': np.maximum(open_, close) + wick,
+        'low': np.minimum(open_, close) - wick,
+        'close': close,
+        'volume': np.round(1000.0 * (1.5 + noise)),
+    }
+
+
+def _ticker_frame(data, ticker, ticker_count):
+    """A ticker's columns from a download grouped by ticker, or None if absent."""
+    if data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        return data[ticker] if ticker in data.columns.get_level_values(0) else None
+    return data if ticker_count == 1 else None
+
+
+def _to_epoch(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return int(timestamp.timestamp())
+
+
+def get_provider():
+    """Provider selected by MARKET_DATA_PROVIDER ('yfinance' or 'replay')."""
+    if os.environ.get('MARKET_DATA_PROVIDER', 'yfinance') == 'replay':
+        return ReplayProvider(
+            fixture_dir=os.environ.get('REPLAY_FIXTURE_DIR'),
+            latency=float(os.environ.get('REPLAY_LATENCY_MS', 0)) / 1000.0
+        )
+    return YFinanceProvider()
@@ -0,0 +1,125 @@
+import re
+import threading
+
+import numpy as np
+
+from bar_store import COLUMN_NAMES, empty_bars
+
+# Native yfinance intervals usable as a resampling base, finest first
+BASE_INTERVALS = [
+    ('1m', 60),
+    ('2m', 120),
+    ('5m', 300),
+    ('15m', 900),
+    ('30m', 1800),
+    ('1h', 3600),
+    ('1d', 86400),
+]
+UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+# How far back yfinance serves each base interval (None: no practical limit)
+BASE_HISTORY_SECONDS = {
+    '1m': 29 * 86400,
+    '2m': 59 * 86400,
+    '5m': 59 * 86400,
+    '15m': 59 * 86400,
+    '30m': 59 * 86400,
+    '1h': 729 * 86400,
+    '1d': None,
+}
+
+
+def parse_timeframe(timeframe):
+    """Returns the length in seconds of an N-minute/hour/day timeframe, or None."""
+    match = re.fullmatch(r'(\d+)([mhd])', timeframe or '')
+    if not match or int(match.group(1)) == 0:
+        return None
+    return int(match.group(1)) * UNIT_SECONDS[match.group(2)]
+
+
+def base_interval_for(seconds):
+    """Coarsest native interval that evenly divides the target bar length."""
+    for interval, base_seconds in reversed(BASE_INTERVALS):
+        if base_seconds <= seconds and seconds % base_seconds == 0:
+            return interval, base_seconds
+    return None
+
+
+def finest_base_interval(seconds, oldest, now):
+    """Finest native interval that divides the target and still reaches back to `oldest`.
+
+    Intraday timeframes share one fine base series per symbol this way, so
+    switching between them needs no extra upstream downloads.
+    """
+    for interval, base_seconds in BASE_INTERVALS:
+        if base_seconds > seconds or seconds % base_seconds:
+            continue
+        limit = BASE_HISTORY_SECONDS[interval]
+        if limit is None or oldest >= now - limit:
+            return interval, base_seconds
+    return base_interval_for(seconds)
+
+
+def resample_bars(bars, seconds):
+    """Aggregates bars into UTC-aligned buckets of the given length."""
+    times = bars['time']
+    if len(times) == 0:
+        return empty_bars()
+
+    buckets = times - times % seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+
+    return {
+        'time': buckets[starts],
+        'open': bars['open'][starts],
+        'high': np.fmax.reduceat(bars['high'], starts),
+        'low': np.fmin.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(np.nan_to_num(bars['volume']), starts),
+    }
+
+
+def slice_bars(bars, start=None, end=None):
+    """Returns the bars with start <= time < end."""
+    times = bars['time']
+    lo = int(np.searchsorted(times, start, side='left')) if start is not None else 0
+    hi = int(np.searchsorted(times, end, side='left')) if end is not None else len(times)
+    return {name: values[lo:hi] for name, values in bars.items()}
+
+
+class ResampleCache:
+    """Keeps derived series per (symbol, timeframe), recomputing only buckets touched by new base bars.
+
+    Entries are keyed on the store's on-disk change log, so merges made by
+    other worker processes invalidate them too.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol, base_interval, seconds, start=None, end=None):
+        """Returns derived bars for [start, end) built from the stored base series."""
+        key = (symbol, base_interval, seconds)
+        with self.store.lock(symbol, base_interval):
+            version = self.store.version(symbol, base_interval)
+            with self._lock:
+                entry = self._entries.get(key)
+
+            if entry is not None and entry[0] == version:
+                derived = entry[1]
+            else:
+                changed = self.store.changed_from(symbol, base_interval, entry[0]) if entry else -1
+                if changed is None or changed < 0:
+                    derived = resample_bars(self.store.read(symbol, base_interval), seconds)
+                else:
+                    # Re-aggregate from the first bucket the new base bars touch
+                    bucket_start = changed - changed % seconds
+                    keep = int(np.searchsorted(entry[1]['time'], bucket_start, side='left'))
+                    fresh = resample_bars(self.store.read(symbol, base_interval, bucket_start), seconds)
+                    derived = {name: np.concatenate([entry[1][name][:keep], fresh[name]]) for name in COLUMN_NAMES}
+                with self._lock:
+                    self._entries[key] = (version, derived)
+
+        return slice_bars(derived, start, end)
@@ -1,17 +1,117 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, has_request_context, jsonify, request, stream_with_context
 from flask_cors import CORS
-import yfinance as yf
 import pandas as pd
 import time
+import os
+import itertools
+import atexit
+import signal
+import sys
+import threading
+import json
+import queue
 import numpy as np
 
+from bar_store import BarStore, frame_to_bars
+from circuit_breaker import CircuitBreaker, GuardedProvider
+from coalesce import SingleFlight
+from correlation import CorrelationTracker, align_closes, log_returns
+from encoding import (
+    BINARY_MIMETYPE, bars_to_binary, bars_to_columns, bars_to_records, bulk_to_binary, negotiate_format
+)
+from incremental import IndicatorStateRegistry
+from indicators import DEFAULT_PARAMS, IndicatorCache, compute_indicators, invalid_params
+from http_cache import HISTORY_CACHE_CONTROL, bars_etag, price_cache_control
+from metrics import CONTENT_TYPE, SIZE_BUCKETS, InstrumentedProvider, MetricsRegistry
+from price_cache import PriceBatcher, PriceCache, PriceRefresher
+from providers import INTERVAL_SECONDS, NoDataError, get_provider
+from price_stream import PriceBroadcaster, format_sse
+from shared_cache import SharedPriceTable
+from snapshot import SnapshotWriter, read_snapshot, write_snapshot
+from resample import (
+    BASE_INTERVALS, ResampleCache, base_interval_for, finest_base_interval, parse_timeframe, resample_bars
+)
+
 app = Flask(__name__)
 CORS(app)
 
 # Cache setup
-cache = {}
-cache_timestamp = 0
 CACHE_DURATION_SECONDS = 60  # Cache for 60 seconds
+CACHE_STALE_SECONDS = 300  # Keep serving expired prices this long while they refresh
+# Background refresh cadence; defaults to refreshing well before entries expire
+PRICE_REFRESH_SECONDS = float(os.environ.get('PRICE_REFRESH_SECONDS', CACHE_DURATION_SECONDS * 0.75))
+LIVE_PRICE_MAX_AGE_SECONDS = 5
+# How long single-symbol price lookups wait to be batched into one download
+PRICE_BATCH_WINDOW_SECONDS = float(os.environ.get('PRICE_BATCH_WINDOW_MS', 50)) / 1000.0
+# Memory-mapped price table shared by all workers on the host (e.g. /dev/shm/forex-prices); off when unset
+SHARED_PRICE_CACHE_PATH = os.environ.get('SHARED_PRICE_CACHE_PATH')
+STREAM_KEEPALIVE_SECONDS = 15  # Comment frames keep proxies from closing idle streams
+
+all_known_symbols = [
+  'XAU/USD', 'XAG/USD', 'EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD',
+  'EUR/JPY', 'GBP/JPY', 'CHF/JPY', 'AUD/JPY', 'CAD/JPY', 'NZD/JPY', 'EUR/GBP',
+  'EUR/CHF', 'EUR/AUD', 'EUR/CAD', 'EUR/NZD', 'GBP/AUD', 'GBP/CAD', 'GBP/NZD',
+  'AUD/CHF', 'AUD/CAD', 'AUD/NZD', 'CAD/CHF', 'NZD/CHF', 'NZD/CAD'
+]
+
+# Bar store setup
+BAR_STORE_DIR = os.environ.get(
+    'BAR_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars')
+)
+# Price cache and indicator states are saved here periodically and on shutdown
+SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH', os.path.join(BAR_STORE_DIR, 'snapshot.json'))
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get('SNAPSHOT_INTERVAL_SECONDS', 60))
+TAIL_REFRESH_SECONDS = 60  # Re-fetch the forming bar at most once a minute
+# Longest stretch without bars (a weekend close) allowed at the edges of a fetched range
+# before the edge is no longer counted as covered
+COVERAGE_GAP_SECONDS = 3 * 24 * 3600
+STREAM_BLOCK_BARS = 5000  # Bars held in memory per block when streaming history
+PAGE_LIMIT_DEFAULT = 1000
+PAGE_LIMIT_MAX = 10000
+CORRELATION_LOOKBACK_DEFAULT = 100
+CORRELATION_LOOKBACK_MAX = 5000
+PERIOD_SECONDS = {
+    '7d': 7 * 24 * 3600,
+    '1mo': 30 * 24 * 3600,
+}
+
+# Metrics setup
+metrics = MetricsRegistry(prefix='forex_data_')
+upstream_seconds = metrics.histogram(
+    'upstream_request_seconds', 'Latency of upstream market data calls.', ('provider', 'operation')
+)
+upstream_errors = metrics.counter(
+    'upstream_errors_total', 'Upstream market data calls that raised.', ('provider', 'operation')
+)
+bar_lookups = metrics.counter(
+    'bar_store_lookups_total', 'History series requests served from the bar store (hit) or fetched upstream (miss).', ('result',)
+)
+serialize_seconds = metrics.histogram('serialize_seconds', 'Time spent encoding response bodies.', ('format',))
+request_seconds = metrics.histogram('http_request_seconds', 'Handler latency per endpoint.', ('endpoint', 'status'))
+response_bytes = metrics.histogram(
+    'http_response_bytes', 'Size of buffered response bodies per endpoint.', ('endpoint',), SIZE_BUCKETS
+)
+
+# Upstream circuit breaker: consecutive failures before opening, and the probe backoff bounds
+UPSTREAM_FAILURE_THRESHOLD = int(os.environ.get('UPSTREAM_FAILURE_THRESHOLD', 3))
+UPSTREAM_BACKOFF_SECONDS = float(os.environ.get('UPSTREAM_BACKOFF_SECONDS', 5))
+UPSTREAM_MAX_BACKOFF_SECONDS = float(os.environ.get('UPSTREAM_MAX_BACKOFF_SECONDS', 300))
+upstream_breaker = CircuitBreaker(UPSTREAM_FAILURE_THRESHOLD, UPSTREAM_BACKOFF_SECONDS, UPSTREAM_MAX_BACKOFF_SECONDS)
+
+bar_store = BarStore(BAR_STORE_DIR)
+provider = GuardedProvider(
+    InstrumentedProvider(get_provider(), upstream_seconds, upstream_errors), upstream_breaker, answered_errors=(NoDataError,)
+)
+metrics.callback_counter(
+    'upstream_circuit_rejections_total', 'Upstream calls refused while the circuit breaker was open.',
+    'provider', lambda: {provider.name: upstream_breaker.rejected}
+)
+history_flights = SingleFlight()
+resample_cache = ResampleCache(bar_store)
+indicator_cache = IndicatorCache()
+indicator_states = IndicatorStateRegistry()
+correlation_tracker = CorrelationTracker()
 
 def format_symbol_for_yfinance(symbol):
     """Formats a trading symbol into a yfinance-compatible ticker."""
@@ -44,18 +144,265 @@ def get_yfinance_interval(timeframe):
     """Maps frontend timeframe to a valid yfinance interval."""
     timeframe_map = {
         '1m': '1m',
-        '3m': '2m',  # yfinance doesn't have '3m', falling back to '2m'
         '5m': '5m',
         '15m': '15m',
         '30m': '30m',
         '1h': '1h',
-        '4h': '1h',  # yfinance doesn't have '4h', we can aggregate later if needed
         '1d': '1d',
         '1wk': '1wk',
         '1mo': '1mo',
     }
     return timeframe_map.get(timeframe, '1h') # Default to '1h' if not found
 
+def resolve_timeframe(timeframe, start, now):
+    """Returns the native interval to fetch and the bar length to resample it to (None if native).
+
+    Intraday timeframes are derived from the finest base series that covers
+    `start`, so 5m, 15m, 1h and 4h charts of a symbol all share its 1m bars.
+    """
+    interval = get_yfinance_interval(timeframe)
+    seconds = parse_timeframe(timeframe)
+    if seconds is None:
+        return interval, None
+    if seconds < 86400:
+        base = finest_base_interval(seconds, start, now)
+    elif seconds == dict(BASE_INTERVALS).get(interval):
+        return interval, None
+    else:
+        base = base_interval_for(seconds)
+    if base is None:
+        return interval, None
+    return base[0], (seconds if seconds != base[1] else None)
+
+def get_default_period(interval):
+    """Default lookback used when no explicit date range is requested."""
+    return '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
+
+def parse_timestamp(value):
+    """Parses a request date into epoch seconds (UTC)."""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return int(timestamp.timestamp())
+
+def download_bars(formatted_symbols, interval, start, end=None):
+    """Downloads [start, end) for one or more tickers (end=None means up to now) and returns bars per ticker."""
+    try:
+        data = provider.download(
+            formatted_symbols,
+            interval,
+            start=pd.Timestamp(start, unit='s', tz='UTC'),
+            end=pd.Timestamp(end, unit='s', tz='UTC') if end is not None else None
+        )
+    except NoDataError:
+        return {}
+    results = {}
+    for formatted_symbol in formatted_symbols:
+        if len(formatted_symbols) == 1:
+            results[formatted_symbol] = frame_to_bars(data)
+        elif formatted_symbol in data.columns:
+            results[formatted_symbol] = frame_to_bars(data[formatted_symbol])
+    return results
+
+def mark_stale(as_of):
+    """Flags the current response as served from data last refreshed at `as_of` (epoch seconds)."""
+    if has_request_context():
+        g.stale_as_of = min(g.get('stale_as_of', as_of), as_of)
+
+def plan_fetch(formatted_symbol, interval, start, end, now):
+    """Returns the upstream range still missing from the store, or None."""
+    meta = bar_store.read_meta(formatted_symbol, interval)
+    covered_from = meta.get('covered_from')
+    covered_to = meta.get('covered_to')
+    if covered_from is None or covered_to is None:
+        return start, end
+
+    fetch_start, fetch_end = None, None
+    if start < covered_from:
+        fetch_start, fetch_end = start, covered_from
+    if end > covered_to and now - covered_to >= TAIL_REFRESH_SECONDS:
+        # Re-fetch from the newest stored bar so the forming candle is refreshed
+        last_time = bar_store.last_time(formatted_symbol, interval)
+        tail_start = min(covered_to, last_time) if last_time is not None else covered_to
+        fetch_start = tail_start if fetch_start is None else fetch_start
+        fetch_end = end
+    if fetch_start is None:
+        return None
+    return fetch_start, fetch_end
+
+def ensure_bars(formatted_symbols, interval, start, end):
+    """Makes the store cover [start, end), fetching only the missing ranges upstream.
+
+    Series locks are only held while planning and merging. The download itself
+    goes through history_flights, so concurrent requests that plan the same
+    fetch share a single upstream call and its frame.
+    """
+    now = int(time.time())
+    end = min(end, now)
+    plans = {}
+    for formatted_symbol in formatted_symbols:
+        with bar_store.lock(formatted_symbol, interval):
+            plan = plan_fetch(formatted_symbol, interval, start, end, now)
+        bar_lookups.inc(result='hit' if plan is None else 'miss')
+        if plan is not None:
+            plans[formatted_symbol] = plan
+    if not plans:
+        return
+
+    # One multi-ticker download covering every stale series. Quantize the range
+    # so near-simultaneous requests produce the same flight key.
+    fetch_start = min(plan[0] for plan in plans.values())
+    fetch_start -= fetch_start % TAIL_REFRESH_SECONDS
+    fetch_end = max(plan[1] for plan in plans.values())
+    open_ended = fetch_end >= now - TAIL_REFRESH_SECONDS
+    key = (tuple(sorted(plans)), interval, fetch_start, None if open_ended else fetch_end)
+    try:
+        fetched = history_flights.do(
+            key, lambda: download_bars(sorted(plans), interval, fetch_start, None if open_ended else fetch_end)
+        )
+    except Exception as e:
+        # Upstream is failing or the breaker is open: serve what the store already has
+        covered = [bar_store.read_meta(s, interval).get('covered_to') for s in plans if bar_store.length(s, interval)]
+        if not covered:
+            raise
+        print(f"Serving stored bars for {', '.join(sorted(plans))} ({interval}): {str(e)}")
+        mark_stale(min(covered))
+        return
+
+    bar_seconds = INTERVAL_SECONDS.get(interval, 60)
+    for formatted_symbol in plans:
+        bars = fetched.get(formatted_symbol)
+        if bars is None or not len(bars['time']):
+            # An empty answer is a failed fetch: leave coverage alone so it is retried
+            print(f"No bars returned for {formatted_symbol} ({interval})")
+            if bar_store.length(formatted_symbol, interval):
+                mark_stale(bar_store.read_meta(formatted_symbol, interval).get('covered_to', fetch_start))
+            continue
+        # Cover only what the bars span, snapping to the requested edges across market closures
+        first, last = int(bars['time'][0]), int(bars['time'][-1]) + bar_seconds
+        span_from = fetch_start if first - fetch_start <= COVERAGE_GAP_SECONDS else first
+        span_to = fetch_end if fetch_end - last <= COVERAGE_GAP_SECONDS else last
+        with bar_store.lock(formatted_symbol, interval):
+            bar_store.merge(formatted_symbol, interval, bars)
+            meta = bar_store.read_meta(formatted_symbol, interval)
+            meta['covered_from'] = min(meta.get('covered_from', span_from), span_from)
+            meta['covered_to'] = max(meta.get('covered_to', span_to), span_to)
+            bar_store.write_meta(formatted_symbol, interval, meta)
+
+def prepare_bars(formatted_symbols, timeframe, start=None, end=None):
+    """Resolves a frontend timeframe and makes the store cover its window.
+
+    Without an explicit range the default lookback for the timeframe is used.
+    Returns (base interval, resample seconds or None, start, end).
+    """
+    now = int(time.time())
+    if end is None:
+        end = now
+    if start is None:
+        start = end - PERIOD_SECONDS[get_default_period(get_yfinance_interval(timeframe))]
+    interval, seconds = resolve_timeframe(timeframe, start, now)
+
+    # Start on a bucket boundary so the first derived bar is complete
+    if seconds is not None:
+        start -= start % seconds
+    # Cover whole UTC days of the base series so every timeframe derived from it
+    # finds its window already stored
+    ensure_bars(formatted_symbols, interval, start - start % 86400, end)
+    return interval, seconds, start, end
+
+def load_bars(formatted_symbols, timeframe, start=None, end=None):
+    """Serves [start, end) bars for a frontend timeframe, resampling when it isn't native."""
+    interval, seconds, start, end = prepare_bars(formatted_symbols, timeframe, start, end)
+    if seconds is None:
+        return {s: bar_store.read(s, interval, start, end) for s in formatted_symbols}
+    return {s: resample_cache.get(s, interval, seconds, start, end) for s in formatted_symbols}
+
+def iter_bar_blocks(formatted_symbol, interval, seconds, start, end, block_bars):
+    """Yields bars in [start, end) as blocks of at most block_bars, read straight from the store.
+
+    Derived timeframes are resampled block by block; blocks are whole multiples
+    of the bar length, so no bucket straddles two blocks.
+    """
+    step = (seconds or INTERVAL_SECONDS.get(interval, 3600)) * block_bars
+    for block_start in range(start, end, step):
+        block_end = min(block_start + step, end)
+        bars = bar_store.read(formatted_symbol, interval, block_start, block_end)
+        if seconds is not None:
+            bars = resample_bars(bars, seconds)
+        if len(bars['time']):
+            yield bars
+
+def stream_records(blocks):
+    """Streams blocks as one JSON array of records, identical to the buffered response."""
+    yield '['
+    for i, bars in enumerate(blocks):
+        body = json.dumps(bars_to_records(bars), separators=(',', ':'))[1:-1]
+        yield (',' if i else '') + body
+    yield ']'
+
+def render_bars(bars_by_pair, bulk, key_parts):
+    """Serializes bars in the format the client negotiated (records, columns or binary).
+
+    Answers a matching If-None-Match with 304 before any serialization work.
+    """
+    response_format = negotiate_format(request.args, request.headers)
+    etag = bars_etag((bulk, response_format) + tuple(key_parts), bars_by_pair)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif response_format == 'binary':
+        with serialize_seconds.time(format='binary'):
+            payload = bulk_to_binary(bars_by_pair) if bulk else bars_to_binary(next(iter(bars_by_pair.values())))
+        response = Response(payload, mimetype=BINARY_MIMETYPE)
+    else:
+        encode = bars_to_columns if response_format == 'columns' else bars_to_records
+        with serialize_seconds.time(format=response_format):
+            results = {pair: encode(bars) if len(bars['time']) else [] for pair, bars in bars_by_pair.items()}
+            response = jsonify(results if bulk else next(iter(results.values())))
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = HISTORY_CACHE_CONTROL
+    response.vary.add('Accept')
+    return response
+
+def cacheable_price_response(payload, pairs):
+    """Adds validators and a max-age matching the cache entries' remaining freshness."""
+    fetched_at = price_cache.fetched_at(pairs)
+    if fetched_at is not None and time.time() - fetched_at >= CACHE_DURATION_SECONDS:
+        mark_stale(fetched_at)
+    with serialize_seconds.time(format='prices'):
+        response = jsonify(payload)
+    response.headers['Cache-Control'] = price_cache_control(fetched_at, CACHE_DURATION_SECONDS, time.time())
+    if fetched_at is not None:
+        response.last_modified = fetched_at
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unknown'
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Streamed responses are timed up to their first byte
+        request_seconds.observe(time.perf_counter() - started, endpoint=endpoint, status=str(response.status_code))
+    if not response.is_streamed:
+        response_bytes.observe(response.calculate_content_length() or 0, endpoint=endpoint)
+    return response
+
+@app.after_request
+def add_staleness_headers(response):
+    """Marks responses built from cached data that upstream could not refresh."""
+    stale_as_of = g.get('stale_as_of')
+    if stale_as_of is not None:
+        response.headers['Warning'] = '110 - "Response is Stale"'
+        response.headers['X-Data-As-Of'] = str(int(stale_as_of))
+        response.headers['X-Upstream-State'] = upstream_breaker.state
+    return response
+
 @app.route('/api/forex-data')
 def get_forex_data():
     pair = request.args.get('pair')
@@ -67,65 +414,86 @@ def get_forex_data():
         return jsonify({'error': 'The "pair" parameter is required.'}), 400
 
     formatted_pair = format_symbol_for_yfinance(pair)
-    interval = get_yfinance_interval(timeframe)
-    
-    # Construct parameters for yfinance
-    params = {'interval': interval}
-    if start_date and end_date:
-        params['start'] = start_date
-        params['end'] = end_date
-    else:
-        # Default period if no date range is provided
-        params['period'] = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
 
     try:
-        # Use yf.download for more robust fetching
-        data = yf.download(
-            tickers=formatted_pair,
-            **params,
-            auto_adjust=False,
-            progress=False
-        )
+        if start_date and end_date:
+            start, end = parse_timestamp(start_date), parse_timestamp(end_date)
+        else:
+            # Default period if no date range is provided
+            start, end = None, None
 
-        if data.empty:
+        if request.args.get('stream'):
+            # Long ranges: send the same JSON array in bounded blocks from the store
+            interval, seconds, start, end = prepare_bars([formatted_pair], timeframe, start, end)
+            blocks = iter_bar_blocks(formatted_pair, interval, seconds, start, end, STREAM_BLOCK_BARS)
+            first = next(blocks, None)
+            if first is None:
+                return jsonify({'error': f'No data found for {pair} with the specified parameters.'}), 404
+            return Response(stream_with_context(stream_records(itertools.chain([first], blocks))), mimetype='application/json')
+
+        bars = load_bars([formatted_pair], timeframe, start, end)[formatted_pair]
+
+        if len(bars['time']) == 0:
             return jsonify({'error': f'No data found for {pair} with the specified parameters.'}), 404
 
-        data.reset_index(inplace=True)
-        
-        # Identify the correct timestamp column
-        timestamp_col = 'Datetime' if 'Datetime' in data.columns else 'Date'
-        
-        # Standardize timestamp to UTC
-        if data[timestamp_col].dt.tz:
-            data[timestamp_col] = data[timestamp_col].dt.tz_convert('UTC')
-        else:
-            data[timestamp_col] = data[timestamp_col].dt.tz_localize('UTC')
-        
-        data['time'] = data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        # Rename columns to be frontend-friendly
-        data.rename(columns={
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        }, inplace=True)
-
-        # Ensure all required columns are present
-        required_cols = ['time', 'open', 'high', 'low', 'close']
-        if 'volume' in data.columns:
-            required_cols.append('volume')
-        
-        # Replace NaN with None for JSON compatibility
-        data.replace({np.nan: None}, inplace=True)
-        
-        return jsonify(data[required_cols].to_dict(orient='records'))
+        return render_bars({pair: bars}, bulk=False, key_parts=(timeframe, start_date, end_date))
 
     except Exception as e:
         print(f"Error fetching data for {pair}: {str(e)}")
         return jsonify({'error': f'An error occurred while fetching data for {pair}.'}), 500
 
+@app.route('/api/forex-data/pages')
+def get_forex_data_page():
+    """Cursor-paginated history: each page holds at most `limit` bars plus the cursor for the next."""
+    pair = request.args.get('pair')
+    timeframe = request.args.get('timeframe', '1h')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    if not pair:
+        return jsonify({'error': 'The "pair" parameter is required.'}), 400
+    try:
+        limit = min(int(request.args.get('limit', PAGE_LIMIT_DEFAULT)), PAGE_LIMIT_MAX)
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError:
+        return jsonify({'error': 'The "limit" and "cursor" parameters must be integers.'}), 400
+    if limit < 1:
+        return jsonify({'error': 'The "limit" parameter must be positive.'}), 400
+
+    formatted_pair = format_symbol_for_yfinance(pair)
+
+    try:
+        start = parse_timestamp(start_date) if start_date else None
+        end = parse_timestamp(end_date) if end_date else None
+        interval, seconds, start, end = prepare_bars([formatted_pair], timeframe, start, end)
+        if cursor is not None:
+            start = max(start, cursor)
+
+        # Read one bar past the page to know whether another page follows
+        collected, total = [], 0
+        for bars in iter_bar_blocks(formatted_pair, interval, seconds, start, end, limit + 1):
+            collected.append(bars)
+            total += len(bars['time'])
+            if total > limit:
+                break
+
+        if collected:
+            page = {name: np.concatenate([b[name] for b in collected]) for name in collected[0]}
+        else:
+            page = {'time': np.empty(0, dtype=np.int64)}
+        next_cursor = int(page['time'][limit]) if total > limit else None
+        page = {name: values[:limit] for name, values in page.items()}
+
+        encode = bars_to_columns if request.args.get('format') == 'columns' else bars_to_records
+        return jsonify({
+            'bars': encode(page) if len(page['time']) else [],
+            'next_cursor': next_cursor,
+        })
+
+    except Exception as e:
+        print(f"Error fetching data page for {pair}: {str(e)}")
+        return jsonify({'error': f'An error occurred while fetching data for {pair}.'}), 500
+
 @app.route('/api/bulk-forex-data')
 def get_bulk_forex_data():
     pairs = request.args.get('pairs')
@@ -136,56 +504,134 @@ def get_bulk_forex_data():
 
     pairs_list = pairs.split(',')
     formatted_pairs_list = [format_symbol_for_yfinance(p) for p in pairs_list]
-    interval = get_yfinance_interval(timeframe)
-    period = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
 
     try:
-        data = yf.download(
-            tickers=formatted_pairs_list,
-            period=period,
-            interval=interval,
-            group_by='ticker',
-            auto_adjust=False,
-            threads=True,
-            progress=False
+        bars_by_symbol = load_bars(formatted_pairs_list, timeframe)
+        return render_bars(
+            {pair: bars_by_symbol[formatted_pairs_list[i]] for i, pair in enumerate(pairs_list)},
+            bulk=True,
+            key_parts=(timeframe,)
         )
 
+    except Exception as e:
+        print(f"Error fetching bulk historical data: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching bulk historical data.'}), 500
+
+@app.route('/api/indicators')
+def get_indicators():
+    pair = request.args.get('pair')
+    timeframe = request.args.get('timeframe', '1h')
+    if not pair:
+        return jsonify({'error': 'The "pair" parameter is required.'}), 400
+
+    names = tuple(sorted(set(request.args.get('indicators', 'atr,ema,rsi,swings,levels').split(','))))
+    try:
+        params = {
+            name: type(default)(request.args.get(name, default))
+            for name, default in DEFAULT_PARAMS.items()
+        }
+        series_length = int(request.args.get('series', 0))
+    except ValueError:
+        return jsonify({'error': 'Indicator parameters must be numeric.'}), 400
+    invalid = invalid_params(params) + (['series'] if series_length < 0 else [])
+    if invalid:
+        return jsonify({'error': f"Indicator parameters out of range: {', '.join(invalid)}."}), 400
+
+    formatted_pair = format_symbol_for_yfinance(pair)
+
+    try:
+        bars = load_bars([formatted_pair], timeframe)[formatted_pair]
+        if len(bars['time']) == 0:
+            return jsonify({'error': f'No data found for {pair} with the specified parameters.'}), 404
+
+        key = (formatted_pair, timeframe, names, tuple(sorted(params.items())), series_length)
+        result = indicator_cache.get(key, bars, lambda: compute_indicators(bars, params, names, series_length))
+        return jsonify(dict(result, pair=pair, timeframe=timeframe))
+
+    except Exception as e:
+        print(f"Error computing indicators for {pair}: {str(e)}")
+        return jsonify({'error': f'An error occurred while computing indicators for {pair}.'}), 500
+
+@app.route('/api/indicators/live')
+def get_live_indicators():
+    """Latest ATR/EMA/RSI for many pairs from incremental per-symbol state."""
+    pairs = request.args.get('pairs')
+    timeframe = request.args.get('timeframe', '1h')
+    if not pairs:
+        return jsonify({'error': 'The "pairs" parameter is required.'}), 400
+
+    try:
+        params = {
+            name: int(request.args.get(name, DEFAULT_PARAMS[name]))
+            for name in ('atr_period', 'ema_period', 'rsi_period')
+        }
+    except ValueError:
+        return jsonify({'error': 'Indicator parameters must be numeric.'}), 400
+    invalid = invalid_params(params)
+    if invalid:
+        return jsonify({'error': f"Indicator parameters out of range: {', '.join(invalid)}."}), 400
+    periods = tuple(params.values())
+
+    pairs_list = pairs.split(',')
+    formatted_pairs_list = [format_symbol_for_yfinance(p) for p in pairs_list]
+
+    try:
+        bars_by_symbol = load_bars(formatted_pairs_list, timeframe)
         results = {}
         for i, pair in enumerate(pairs_list):
             formatted_pair = formatted_pairs_list[i]
-            
-            if formatted_pair in data.columns:
-                pair_data = data[formatted_pair].copy()
-                pair_data.reset_index(inplace=True)
-                
-                timestamp_col = 'Datetime' if 'Datetime' in pair_data.columns else 'Date'
-                
-                if pair_data[timestamp_col].dt.tz:
-                    pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_convert('UTC')
-                else:
-                    pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_localize('UTC')
-                
-                pair_data['time'] = pair_data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-                pair_data.rename(columns={
-                    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-                }, inplace=True)
-                
-                required_cols = ['time', 'open', 'high', 'low', 'close']
-                if 'volume' in pair_data.columns:
-                    required_cols.append('volume')
-                
-                # Replace NaN with None for JSON compatibility
-                pair_data.replace({np.nan: None}, inplace=True)
-                results[pair] = pair_data[required_cols].to_dict(orient='records')
-            else:
-                results[pair] = []
-
+            # Only bars newer than the state's last bar are applied, each in O(1)
+            results[pair] = indicator_states.sync(formatted_pair, timeframe, periods, bars_by_symbol[formatted_pair])
         return jsonify(results)
 
     except Exception as e:
-        print(f"Error fetching bulk historical data: {str(e)}")
-        return jsonify({'error': 'An error occurred while fetching bulk historical data.'}), 500
+        print(f"Error updating live indicators: {str(e)}")
+        return jsonify({'error': 'An error occurred while updating live indicators.'}), 500
+
+@app.route('/api/correlation')
+def get_correlation():
+    """Correlation matrix of log returns over the last `lookback` bars."""
+    timeframe = request.args.get('timeframe', '1h')
+    pairs = request.args.get('pairs')
+    pairs_list = list(dict.fromkeys(pairs.split(','))) if pairs else all_known_symbols
+    try:
+        lookback = min(int(request.args.get('lookback', CORRELATION_LOOKBACK_DEFAULT)), CORRELATION_LOOKBACK_MAX)
+    except ValueError:
+        return jsonify({'error': 'The "lookback" parameter must be an integer.'}), 400
+    if lookback < 2 or len(pairs_list) < 2:
+        return jsonify({'error': 'At least two pairs and a lookback of two bars are required.'}), 400
+
+    formatted_pairs_list = [format_symbol_for_yfinance(p) for p in pairs_list]
+    # Reach back far enough for the lookback, with room for weekends and gaps
+    bar_seconds = parse_timeframe(timeframe) or INTERVAL_SECONDS.get(get_yfinance_interval(timeframe), 3600)
+    end = int(time.time())
+    start = end - max(
+        PERIOD_SECONDS[get_default_period(get_yfinance_interval(timeframe))],
+        int((lookback + 1) * bar_seconds * 1.6)
+    )
+
+    try:
+        bars_by_symbol = load_bars(formatted_pairs_list, timeframe, start, end)
+        times, closes = align_closes(bars_by_symbol, formatted_pairs_list)
+        return_times, returns = log_returns(times, closes)
+        window_times, matrix = correlation_tracker.update(
+            (timeframe, lookback, tuple(formatted_pairs_list)), return_times, returns, lookback
+        )
+        if matrix is None:
+            return jsonify({'error': 'Not enough overlapping data to compute correlations.'}), 404
+
+        return jsonify({
+            'timeframe': timeframe,
+            'lookback': lookback,
+            'observations': int(len(window_times)),
+            'last_time': int(window_times[-1]),
+            'pairs': pairs_list,
+            'matrix': np.where(np.isnan(matrix), None, np.round(matrix, 4)).tolist(),
+        })
+
+    except Exception as e:
+        print(f"Error computing correlation matrix: {str(e)}")
+        return jsonify({'error': 'An error occurred while computing the correlation matrix.'}), 500
 
 @app.route('/api/forex-price')
 def get_forex_price():
@@ -196,99 +642,200 @@ def get_forex_price():
     formatted_pair = format_symbol_for_yfinance(pair)
 
     try:
-        ticker = yf.Ticker(formatted_pair)
-        if not ticker.info:
+        # Served from the warm cache, or batched with other lookups into one download
+        cached = price_batcher.get(pair)
+        if cached and cached.get('price') is not None:
+            return cacheable_price_response(cached, [pair])
+
+        # The batch had no recent bars for this symbol; ask for the quote directly
+        info = provider.ticker_info(formatted_pair)
+        if not info:
             return jsonify({'error': f'Invalid ticker symbol: {pair}'}), 404
-        info = ticker.info
 
         # yfinance provides different fields for price, try to find one that exists
         price = info.get('regularMarketPrice') or info.get('bid') or info.get('ask')
 
         if price:
-            return jsonify({'pair': pair, 'price': price})
+            response = jsonify({'pair': pair, 'price': price})
         else:
             # If no direct price field, try to get the last close price from a short period
-            data = ticker.history(period='1d', interval='1m')
+            data = provider.ticker_history(formatted_pair, period='1d', interval='1m')
             if not data.empty:
                 latest_price = data['Close'].iloc[-1]
-                return jsonify({'pair': pair, 'price': latest_price})
+                response = jsonify({'pair': pair, 'price': latest_price})
             else:
                 return jsonify({'error': f'No price data found for {pair}'}), 404
 
+        # Fetched live, so let shared caches absorb bursts for a few seconds only
+        response.headers['Cache-Control'] = f'public, max-age={LIVE_PRICE_MAX_AGE_SECONDS}'
+        response.add_etag()
+        return response.make_conditional(request)
+
     except Exception as e:
         print(f"Error fetching data for {pair}: {str(e)}")
         return jsonify({'error': f'An error occurred while fetching data for {pair}.'}), 500
 
-@app.route('/api/bulk-forex-price')
-def get_bulk_forex_price():
-    global cache, cache_timestamp
-    current_time = time.time()
-
-    # Check if cache is valid
-    if current_time - cache_timestamp < CACHE_DURATION_SECONDS and cache:
-        pairs = request.args.get('pairs')
-        if not pairs:
-            return jsonify(cache)
-        pairs_list = pairs.split(',')
-        # Return only the requested pairs from the cache
-        cached_results = {pair: cache.get(pair) for pair in pairs_list if pair in cache}
-        return jsonify(cached_results)
-
-    # If cache is invalid, fetch new data for all known symbols
-    all_known_symbols = [
-      'XAU/USD', 'XAG/USD', 'EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD',
-      'EUR/JPY', 'GBP/JPY', 'CHF/JPY', 'AUD/JPY', 'CAD/JPY', 'NZD/JPY', 'EUR/GBP',
-      'EUR/CHF', 'EUR/AUD', 'EUR/CAD', 'EUR/NZD', 'GBP/AUD', 'GBP/CAD', 'GBP/NZD',
-      'AUD/CHF', 'AUD/CAD', 'AUD/NZD', 'CAD/CHF', 'NZD/CHF', 'NZD/CAD'
-    ]
-    formatted_pairs_list = [format_symbol_for_yfinance(p) for p in all_known_symbols]
-    
+def fetch_latest_prices(pairs):
+    """Downloads the latest 1m close for each pair in one multi-ticker request."""
+    formatted_pairs_list = [format_symbol_for_yfinance(p) for p in pairs]
     try:
-        data = yf.download(
-            tickers=formatted_pairs_list,
-            period='1d',
-            interval='1m',
-            group_by='ticker',
-            auto_adjust=True,
-            threads=True,
-            progress=False
-        )
-
-        new_cache_data = {}
-        for i, pair in enumerate(all_known_symbols):
-            formatted_pair = formatted_pairs_list[i]
-            
-            if formatted_pair in data.columns and not data[formatted_pair].empty:
-                last_price = data[formatted_pair]['Close'].dropna().iloc[-1] if not data[formatted_pair]['Close'].dropna().empty else None
-                if last_price is not None and pd.notna(last_price):
-                    new_cache_data[pair] = {'pair': pair, 'price': last_price}
-                else:
-                    new_cache_data[pair] = {'error': f'No recent price data for {pair}'}
+        data = provider.download(formatted_pairs_list, '1m', period='1d', auto_adjust=True)
+    except NoDataError:
+        data = pd.DataFrame()
+
+    prices = {}
+    for i, pair in enumerate(pairs):
+        formatted_pair = formatted_pairs_list[i]
+        bars = frame_to_bars(data[formatted_pair]) if formatted_pair in data.columns else None
+
+        if bars is not None and len(bars['time']):
+            closes = bars['close'][~np.isnan(bars['close'])]
+            if len(closes):
+                prices[pair] = {'pair': pair, 'price': float(closes[-1])}
             else:
-                 new_cache_data[pair] = {'error': f'No data found for {pair}'}
-        
-        # Update cache
-        cache = new_cache_data
-        cache_timestamp = current_time
-        
-        # Return requested pairs from the newly fetched data
-        requested_pairs = request.args.get('pairs')
-        if not requested_pairs:
-            return jsonify(cache)
-        
-        requested_pairs_list = requested_pairs.split(',')
-        requested_results = {pair: cache.get(pair) for pair in requested_pairs_list if pair in cache}
-        return jsonify(requested_results)
+                prices[pair] = {'error': f'No recent price data for {pair}'}
+        else:
+            prices[pair] = {'error': f'No data found for {pair}'}
+    return prices
+
+shared_prices = SharedPriceTable(SHARED_PRICE_CACHE_PATH) if SHARED_PRICE_CACHE_PATH else None
+price_cache = PriceCache(
+    fetch_latest_prices, CACHE_DURATION_SECONDS, CACHE_STALE_SECONDS,
+    shared=shared_prices, is_failure=lambda value: 'error' in value
+)
+metrics.callback_counter(
+    'price_cache_lookups_total', 'Per-symbol price cache lookups by outcome.', 'result', lambda: dict(price_cache.lookups)
+)
+price_batcher = PriceBatcher(price_cache, PRICE_BATCH_WINDOW_SECONDS)
+price_broadcaster = PriceBroadcaster()
+price_cache.add_listener(price_broadcaster.publish)
+price_refresher = PriceRefresher(
+    price_cache,
+    lambda: list(dict.fromkeys(all_known_symbols + sorted(price_broadcaster.subscribed_pairs()))),
+    PRICE_REFRESH_SECONDS
+)
+
+def save_snapshot():
+    return write_snapshot(SNAPSHOT_PATH, {
+        'prices': price_cache.snapshot(),
+        'indicator_states': indicator_states.snapshot(),
+    })
+
+def restore_snapshot():
+    """Warms the caches from the last snapshot; returns its save time or None.
+
+    Restored prices keep their original load time, so they are served (flagged
+    stale) and revalidated like any other aging entry. Bars need no restore:
+    the bar store is already on disk.
+    """
+    snapshot = read_snapshot(SNAPSHOT_PATH)
+    if snapshot is None:
+        return None
+    saved_at, sections = snapshot
+    try:
+        price_cache.restore(sections.get('prices', []))
+        indicator_states.restore(sections.get('indicator_states', []))
+    except Exception as e:
+        print(f"Error restoring snapshot: {str(e)}")
+        return None
+    print(f"Restored snapshot saved {time.time() - saved_at:.0f}s ago")
+    return saved_at
+
+snapshot_writer = SnapshotWriter(save_snapshot, SNAPSHOT_INTERVAL_SECONDS)
+snapshot_restored_at = restore_snapshot()
+background_lock = threading.Lock()
+background_pid = None
+
+def start_background_tasks():
+    """Starts the price refresher and snapshot writer once per process, saving a final snapshot at exit.
+
+    Called before each request (and by the serving entry points), so every
+    worker runs them but a pre-fork master (gunicorn --preload) never does and
+    never takes the shared table's writer lock; that lock keeps workers from
+    refreshing the same prices twice.
+    """
+    global background_pid
+    with background_lock:
+        if background_pid == os.getpid():
+            return
+        first_start = background_pid is None
+        background_pid = os.getpid()
+    price_refresher.start()
+    snapshot_writer.start()
+    if first_start:
+        atexit.register(snapshot_writer.stop)
+
+@app.before_request
+def ensure_background_tasks():
+    start_background_tasks()
+
+@app.route('/api/bulk-forex-price')
+def get_bulk_forex_price():
+    pairs = request.args.get('pairs')
+    pairs_list = pairs.split(',') if pairs else all_known_symbols
 
+    try:
+        return cacheable_price_response(price_cache.get_many(pairs_list), pairs_list)
     except Exception as e:
         print(f"Error fetching bulk data: {str(e)}")
-        # Return stale cache data if available, otherwise error
-        if cache:
-            return jsonify(cache)
         return jsonify({'error': 'An error occurred while fetching bulk data and cache is empty.'}), 500
 
-import os
+@app.route('/api/stream/forex-price')
+def stream_forex_price():
+    """Server-sent events: a snapshot of the requested pairs, then only prices that change."""
+    pairs = request.args.get('pairs')
+    pairs_list = pairs.split(',') if pairs else all_known_symbols
+
+    # Updates are driven by the refresher, which may not be running under a WSGI server yet
+    start_background_tasks()
+    subscription = price_broadcaster.subscribe(pairs_list)
+
+    def generate():
+        try:
+            try:
+                yield format_sse(price_cache.get_many(pairs_list), event='snapshot')
+            except Exception as e:
+                print(f"Error building stream snapshot: {str(e)}")
+            while not subscription.closed:
+                try:
+                    update = subscription.updates.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(update)
+        finally:
+            price_broadcaster.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/price-cache/status')
+def get_price_cache_status():
+    status = price_refresher.status()
+    status['upstream'] = upstream_breaker.status()
+    status['snapshot'] = {
+        'path': SNAPSHOT_PATH,
+        'restored_from': snapshot_restored_at,
+        'last_saved': snapshot_writer.last_saved,
+        'last_error': snapshot_writer.last_error,
+    }
+    return jsonify(status), (200 if not status['behind'] else 503)
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text exposition of this process's metrics."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5009))
-    app.run(port=port, debug=True)
+    # The debug reloader serves from a child process that the parent's
+    # supervisor never signals, so it is opt-in for local development
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
+        # supervisord stops with SIGTERM; exit normally so the final snapshot is written
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    app.run(port=port, debug=debug)
@@ -0,0 +1,127 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+import zlib
+
+# File layout (little-endian): header '<4sHHI' (magic, version, reserved, slot
+# count), then fixed-size slots. Each slot is a seqlock sequence number (odd
+# while being written), the load time, the payload length, a NUL-padded key
+# and the JSON-encoded value.
+SHARED_MAGIC = b'PRCS'
+SHARED_VERSION = 1
+DEFAULT_SLOTS = 512
+SLOT_SIZE = 256
+_HEADER = struct.Struct('<4sHHI')
+_SLOT = struct.Struct('<QdH32s')
+MAX_PAYLOAD = SLOT_SIZE - _SLOT.size
+READ_RETRIES = 100  # Attempts before giving up on a slot that keeps changing under the reader
+
+
+class SharedPriceTable:
+    """Price entries in a memory-mapped file shared by every worker on the host.
+
+    One process at a time holds the writer lock (an flock on ``path + '.writer'``)
+    and is the only one that stores values. Readers never lock: each slot is
+    guarded by a sequence number the writer makes odd while updating it, and a
+    reader retries until it sees the same even number before and after copying.
+    Keys are hashed into slots with linear probing and are never removed.
+    """
+
+    def __init__(self, path, slots=DEFAULT_SLOTS):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Exclusive while sizing so concurrent first starts agree on the layout
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            size = os.fstat(fd).st_size
+            if size < _HEADER.size or os.pread(fd, 4, 0) != SHARED_MAGIC:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, _HEADER.size + slots * SLOT_SIZE)
+                os.pwrite(fd, _HEADER.pack(SHARED_MAGIC, SHARED_VERSION, 0, slots), 0)
+            self._map = mmap.mmap(fd, 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+        magic, version, _, self.slots = _HEADER.unpack_from(self._map, 0)
+        if version != SHARED_VERSION or len(self._map) < _HEADER.size + self.slots * SLOT_SIZE:
+            raise ValueError(f'Incompatible shared price table at {path}')
+        self._slot_of = {}
+        self._writer_fd = None
+        self._writer_pid = None
+
+    def is_writer(self):
+        """True if this process holds the writer lock, taking it if it is free."""
+        if self._writer_fd is not None and self._writer_pid != os.getpid():
+            # Inherited across a fork: the flock belongs to the parent's open
+            # file description, so this process must win the lock on its own
+            os.close(self._writer_fd)
+            self._writer_fd = None
+        if self._writer_fd is None:
+            fd = os.open(self.path + '.writer', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._writer_fd = fd
+            self._writer_pid = os.getpid()
+        return True
+
+    def _offset(self, index):
+        return _HEADER.size + index * SLOT_SIZE
+
+    def _find(self, key_bytes, claim):
+        """Slot index holding the key; with claim, the first empty slot on its probe path."""
+        if key_bytes in self._slot_of:
+            return self._slot_of[key_bytes]
+        start = zlib.crc32(key_bytes) % self.slots
+        for step in range(self.slots):
+            index = (start + step) % self.slots
+            slot_key = _SLOT.unpack_from(self._map, self._offset(index))[3].rstrip(b'\0')
+            if slot_key == key_bytes or (not slot_key and claim):
+                self._slot_of[key_bytes] = index
+                return index
+            if not slot_key:
+                return None
+        return None
+
+    def get(self, key):
+        """Returns (value, fetched_at) for a key, or None if it has never been stored."""
+        key_bytes = key.encode('utf-8')
+        index = self._find(key_bytes, claim=False)
+        if index is None:
+            return None
+        offset = self._offset(index)
+        for _ in range(READ_RETRIES):
+            seq, fetched_at, length, slot_key = _SLOT.unpack_from(self._map, offset)
+            if seq % 2:
+                continue
+            payload = self._map[offset + _SLOT.size:offset + _SLOT.size + length]
+            if _SLOT.unpack_from(self._map, offset)[0] != seq:
+                continue
+            if slot_key.rstrip(b'\0') != key_bytes or not length:
+                return None
+            return json.loads(payload), fetched_at
+        return None
+
+    def put(self, key, value, fetched_at):
+        """Stores a value; only the writer may call this. Returns False if it does not fit."""
+        key_bytes = key.encode('utf-8')
+        payload = json.dumps(value, separators=(',', ':')).encode('utf-8')
+        if len(key_bytes) > 32 or len(payload) > MAX_PAYLOAD:
+            return False
+        index = self._find(key_bytes, claim=True)
+        if index is None:
+            return False
+        offset = self._offset(index)
+        seq = _SLOT.unpack_from(self._map, offset)[0]
+        # A writer that died mid-update leaves the sequence odd; resume from there
+        seq += 1 - seq % 2
+        struct.pack_into('<Q', self._map, offset, seq)
+        self._map[offset + _SLOT.size:offset + _SLOT.size + len(payload)] = payload
+        struct.pack_into('<dH32s', self._map, offset + 8, fetched_at, len(payload), key_bytes)
+        struct.pack_into('<Q', self._map, offset, seq + 1)
+        return True
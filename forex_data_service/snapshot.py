@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_VERSION = 1
+
+
+def write_snapshot(path, sections):
+    """Atomically writes the given sections (JSON-serializable) with the save time."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    payload = {'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'sections': sections}
+    # Per-process temp name so workers saving at the same time never interleave
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return payload['saved_at']
+
+
+def read_snapshot(path):
+    """Returns (saved_at, sections), or None if there is no usable snapshot."""
+    try:
+        with open(path) as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable snapshot {path}: {str(e)}")
+        return None
+    if payload.get('version') != SNAPSHOT_VERSION:
+        return None
+    return payload['saved_at'], payload['sections']
+
+
+class SnapshotWriter:
+    """Background thread that calls ``save`` every ``interval`` seconds, plus once on stop."""
+
+    def __init__(self, save, interval):
+        self.save = save
+        self.interval = interval
+        self.last_saved = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the save loop; a no-op while it is running (threads do not survive a fork)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name='snapshot-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.save_once()
+
+    def save_once(self):
+        try:
+            self.last_saved = self.save()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error saving snapshot: {str(e)}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.save_once()
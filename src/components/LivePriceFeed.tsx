@@ -23,17 +23,14 @@ const LivePriceFeed: React.FC<LivePriceFeedProps> = ({ market }) => {
   const selectedSymbols = symbols[market];
 
   useEffect(() => {
-    const fetchPrices = async () => {
-      try {
-        if (market === 'forex') {
-          const url = `http://127.0.0.1:5009/api/bulk-forex-price?pairs=${selectedSymbols.join(',')}`;
-          const response = await fetch(url);
-          if (!response.ok) {
-            console.error(`Error fetching bulk forex prices: ${response.statusText}`);
-            return;
-          }
-          const results = await response.json();
-          const newPrices: any = {};
+    if (market === 'forex') {
+      // The forex service pushes a snapshot followed by only the prices that change
+      const url = `http://127.0.0.1:5009/api/stream/forex-price?pairs=${selectedSymbols.join(',')}`;
+      const source = new EventSource(url);
+      const applyPrices = (event: MessageEvent) => {
+        const results = JSON.parse(event.data);
+        setPrices((current: any) => {
+          const newPrices: any = { ...current };
           for (const symbol in results) {
             if (results[symbol] && results[symbol].price) {
               newPrices[symbol] = {
@@ -42,31 +39,43 @@ const LivePriceFeed: React.FC<LivePriceFeedProps> = ({ market }) => {
               };
             }
           }
-          setPrices(newPrices);
-        } else {
-          const newPrices: any = {};
-          for (const symbol of selectedSymbols) {
-            await new Promise(resolve => setTimeout(resolve, 200));
-            try {
-              const url = `/binance-api/ticker/price?symbol=${symbol}`;
-              const response = await fetch(url);
-              if (!response.ok) {
-                console.error(`Error fetching price for ${symbol}: ${response.statusText}`);
-                continue;
-              }
-              const result = await response.json();
-              if (result && result.price) {
-                newPrices[symbol] = {
-                  price: parseFloat(result.price).toFixed(5),
-                  provider: 'Binance',
-                };
-              }
-            } catch (error) {
-              console.error(`Error fetching price for ${symbol}:`, error);
+          return newPrices;
+        });
+      };
+      source.addEventListener('snapshot', applyPrices as EventListener);
+      source.onmessage = applyPrices;
+      source.onerror = () => {
+        // EventSource reconnects on its own; just surface the interruption
+        console.error('Forex price stream interrupted, reconnecting...');
+      };
+
+      return () => source.close();
+    }
+
+    const fetchPrices = async () => {
+      try {
+        const newPrices: any = {};
+        for (const symbol of selectedSymbols) {
+          await new Promise(resolve => setTimeout(resolve, 200));
+          try {
+            const url = `/binance-api/ticker/price?symbol=${symbol}`;
+            const response = await fetch(url);
+            if (!response.ok) {
+              console.error(`Error fetching price for ${symbol}: ${response.statusText}`);
+              continue;
+            }
+            const result = await response.json();
+            if (result && result.price) {
+              newPrices[symbol] = {
+                price: parseFloat(result.price).toFixed(5),
+                provider: 'Binance',
+              };
             }
+          } catch (error) {
+            console.error(`Error fetching price for ${symbol}:`, error);
           }
-          setPrices(newPrices);
         }
+        setPrices(newPrices);
       } catch (error) {
         console.error('Error fetching prices:', error);
       }
@@ -76,7 +85,7 @@ const LivePriceFeed: React.FC<LivePriceFeedProps> = ({ market }) => {
     const interval = setInterval(fetchPrices, 30000); // Update every 30 seconds
 
     return () => clearInterval(interval);
-  }, [market, selectedSymbols]);
+  }, [market]); // selectedSymbols is derived from market and rebuilt every render
 
   return (
     <div className="bg-gray-800/60 backdrop-blur-sm p-6 rounded-2xl border border-gray-700">
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import re
+import struct
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# File layout (little-endian): header '<4sBBHId' (magic, version, flags, reserved,
+# row count, expires_at epoch seconds, 0 for never), then the time column as
+# int64 epoch seconds and each price column as float64, all contiguous.
+CACHE_MAGIC = b'CNDL'
+CACHE_VERSION = 1
+FLAG_VOLUME = 1
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+_HEADER = struct.Struct('<4sBBHId')
+
+INTERVAL_SECONDS = {
+    '1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '1d': 86400, '1wk': 7 * 86400,
+}
+# Weeks close on Monday 00:00 UTC; the epoch started on a Thursday
+WEEK_OFFSET_SECONDS = 4 * 86400
+# Longest a rolling download is served; its forming bar moves with every tick
+MAX_ROLLING_SECONDS = 60
+# Past-range entries never expire, so they are deleted this long after being written
+RETAIN_SECONDS = 7 * 86400
+PRUNE_INTERVAL_SECONDS = 3600  # Minimum time between directory scans per process
+
+
+def next_bar_close(interval, now):
+    """Epoch time at which the bar forming at `now` closes."""
+    if interval == '1mo':
+        month = pd.Timestamp(now, unit='s').to_period('M') + 1
+        return month.start_time.tz_localize('UTC').timestamp()
+    seconds = INTERVAL_SECONDS.get(interval, 60)
+    offset = WEEK_OFFSET_SECONDS if interval == '1wk' else 0
+    return now - (now - offset) % seconds + seconds
+
+
+def expiry_for(params, now):
+    """When a download with these parameters goes stale: the close of the forming bar,
+    but no more than MAX_ROLLING_SECONDS away.
+
+    Explicit ranges that end in the past never change, so they never expire (0).
+    """
+    end = params.get('end')
+    if end is not None:
+        end_ts = pd.Timestamp(end)
+        if end_ts.tzinfo is None:
+            end_ts = end_ts.tz_localize('UTC')
+        if end_ts.timestamp() <= now:
+            return 0.0
+    return min(next_bar_close(params['interval'], now), now + MAX_ROLLING_SECONDS)
+
+
+class CandleCache:
+    """On-disk candle cache shared by every data_connector process on the host.
+
+    Entries are keyed by (ticker, interval, range) and written to a temporary
+    file that is renamed into place, so readers only ever see complete files.
+    Writers prune the directory at most every PRUNE_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, root, retain=RETAIN_SECONDS):
+        self.root = root
+        self.retain = retain
+        self._last_prune = 0.0
+
+    def _path(self, formatted_symbol, params):
+        key = repr((formatted_symbol, sorted((k, str(v)) for k, v in params.items() if k != 'progress')))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        safe_symbol = re.sub(r'[^A-Za-z0-9]+', '_', formatted_symbol)
+        return os.path.join(self.root, f"{safe_symbol}_{params['interval']}_{digest}.bars")
+
+    def get(self, formatted_symbol, params, now=None):
+        """Returns the cached arrays, or None if missing, expired or unreadable."""
+        path = self._path(formatted_symbol, params)
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return None
+        if len(raw) < _HEADER.size:
+            return None
+        magic, version, flags, _, rows, expires_at = _HEADER.unpack_from(raw, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            return None
+        if expires_at and (now if now is not None else time.time()) >= expires_at:
+            return None
+
+        names = PRICE_COLUMNS + (('volume',) if flags & FLAG_VOLUME else ())
+        if len(raw) != _HEADER.size + rows * 8 * (1 + len(names)):
+            return None
+        arrays = {'time': np.frombuffer(raw, dtype='<i8', count=rows, offset=_HEADER.size)}
+        offset = _HEADER.size + rows * 8
+        for name in names:
+            arrays[name] = np.frombuffer(raw, dtype='<f8', count=rows, offset=offset)
+            offset += rows * 8
+        return arrays
+
+    def put(self, formatted_symbol, params, arrays, now=None):
+        """Atomically stores arrays for a download."""
+        now = now if now is not None else time.time()
+        has_volume = 'volume' in arrays
+        names = PRICE_COLUMNS + (('volume',) if has_volume else ())
+        rows = len(arrays['time'])
+        header = _HEADER.pack(CACHE_MAGIC, CACHE_VERSION, FLAG_VOLUME if has_volume else 0, 0, rows, expiry_for(params, now))
+
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(np.ascontiguousarray(arrays['time'], dtype='<i8').tobytes())
+                for name in names:
+                    f.write(np.ascontiguousarray(arrays[name], dtype='<f8').tobytes())
+            os.replace(tmp_path, self._path(formatted_symbol, params))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self.prune(now)
+
+    def prune(self, now=None):
+        """Deletes expired entries, past-range entries older than `retain` and abandoned temp files."""
+        now = now if now is not None else time.time()
+        self._last_prune = now
+        removed = 0
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return removed
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                age = now - os.path.getmtime(path)
+                if name.endswith('.tmp'):
+                    stale = age >= PRUNE_INTERVAL_SECONDS
+                elif name.endswith('.bars'):
+                    with open(path, 'rb') as f:
+                        header = f.read(_HEADER.size)
+                    expires_at = _HEADER.unpack(header)[5] if len(header) == _HEADER.size else 0.0
+                    stale = now >= expires_at if expires_at else age >= self.retain
+                else:
+                    continue
+                if stale:
+                    os.unlink(path)
+                    removed += 1
+            except (OSError, struct.error):
+                # Another process pruned or replaced it first
+                continue
+        return removed
@@ -1,7 +1,21 @@
 import yfinance as yf
 import pandas as pd
+import numpy as np
 import sys
+import os
 import json
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from candle_cache import CandleCache
+from smc_analysis import analyze
+
+# Requests a daemon runs at once; the rest queue in arrival order
+DAEMON_WORKERS = int(os.environ.get('DATA_CONNECTOR_WORKERS', 4))
+# yf.download collects results in module globals (yfinance.shared), so only one
+# call may run at a time; each call still fetches its tickers in parallel
+download_lock = threading.Lock()
 
 def format_symbol_for_yfinance(symbol):
     """Formats a trading symbol into a yfinance-compatible ticker."""
@@ -26,19 +40,28 @@ def format_symbol_for_yfinance(symbol):
     }
     return special_symbols.get(symbol, symbol)
 
-def get_historical_data(symbol, timeframe, start_date=None, end_date=None):
+TIMEFRAME_MAP = {
+    '1m': '1m', '5m': '5m', '15m': '15m', '30m': '30m',
+    '1h': '1h', '4h': '1h', '1d': '1d', '1wk': '1wk', '1mo': '1mo'
+}
+# Downloads are cached here until their forming bar closes (at most a minute); set to an empty string to disable
+CACHE_DIR = os.environ.get(
+    'DATA_CONNECTOR_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'candles')
+)
+candle_cache = CandleCache(CACHE_DIR) if CACHE_DIR else None
+# Bars converted and written per chunk in NDJSON output, bounding memory on both sides
+STREAM_CHUNK_BARS = int(os.environ.get('DATA_CONNECTOR_CHUNK_BARS', 2000))
+# Concurrent interval groups in a batch; each group is one multi-ticker download
+BATCH_WORKERS = int(os.environ.get('DATA_CONNECTOR_BATCH_WORKERS', 4))
+
+def build_download_params(timeframe, start_date=None, end_date=None):
     """
-    Fetches historical market data from Yahoo Finance with flexible date ranges.
+    Returns the yf.download parameters for a timeframe and optional range, or None if unsupported.
     """
-    formatted_symbol = format_symbol_for_yfinance(symbol)
-
-    timeframe_map = {
-        '1m': '1m', '5m': '5m', '15m': '15m', '30m': '30m',
-        '1h': '1h', '4h': '1h', '1d': '1d', '1wk': '1wk', '1mo': '1mo'
-    }
-    yf_timeframe = timeframe_map.get(timeframe)
+    yf_timeframe = TIMEFRAME_MAP.get(timeframe)
     if not yf_timeframe:
-        return {"error": f"Unsupported timeframe: {timeframe}. Please use a standard format (e.g., '1m', '1h', '1d')."}
+        return None
 
     params = {'interval': yf_timeframe, 'progress': False, 'auto_adjust': False}
     if start_date and end_date:
@@ -46,40 +69,352 @@ def get_historical_data(symbol, timeframe, start_date=None, end_date=None):
         params['end'] = end_date
     else:
         params['period'] = "1mo" if yf_timeframe in ['1d', '1wk', '1mo'] else "7d"
+    return params
 
+def frame_to_arrays(data):
+    """
+    Converts one ticker's OHLCV frame into column arrays, with times as epoch seconds of the exchange-local timestamp.
+    """
+    data = data.dropna(how='all')
+    index = pd.to_datetime(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    arrays = {'time': index.values.astype('datetime64[s]').astype(np.int64)}
+    for column in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        if column in data.columns:
+            arrays[column.lower()] = data[column].to_numpy(dtype=np.float64)
+    return arrays
+
+def arrays_to_records(arrays):
+    """
+    Converts column arrays into the list of candle dicts the bot consumes.
+    """
+    data = pd.DataFrame({name: values for name, values in arrays.items() if name != 'time'}).astype(object)
+    # Replace NaN with None for JSON compatibility
+    data = data.where(data.notna(), None)
+    # Ensure timestamps are in ISO 8601 format
+    data.insert(0, 'date', pd.to_datetime(arrays['time'], unit='s').strftime('%Y-%m-%dT%H:%M:%S'))
+    return data.to_dict('records')
+
+def load_arrays(formatted_symbols, params, threads=True):
+    """
+    Returns column arrays per ticker, downloading only the tickers missing from the cache in one call.
+    """
+    results = {}
+    if candle_cache is not None:
+        for formatted_symbol in formatted_symbols:
+            cached = candle_cache.get(formatted_symbol, params)
+            if cached is not None:
+                results[formatted_symbol] = cached
+
+    missing = [formatted_symbol for formatted_symbol in formatted_symbols if formatted_symbol not in results]
+    if missing:
+        for formatted_symbol, data in download_frames(missing, params, threads=threads).items():
+            arrays = frame_to_arrays(data)
+            if not len(arrays['time']):
+                continue
+            results[formatted_symbol] = arrays
+            if candle_cache is not None:
+                try:
+                    candle_cache.put(formatted_symbol, params, arrays)
+                except OSError as e:
+                    print(f"Could not cache {formatted_symbol}: {str(e)}", file=sys.stderr)
+    return results
+
+def download_frames(formatted_symbols, params, threads=True):
+    """
+    Downloads several tickers in one call and returns each ticker's frame.
+    """
+    with download_lock:
+        data = yf.download(tickers=formatted_symbols, group_by='ticker', threads=threads, **params)
+    frames = {}
+    if data.empty:
+        return frames
+    if isinstance(data.columns, pd.MultiIndex):
+        for formatted_symbol in formatted_symbols:
+            if formatted_symbol in data.columns.get_level_values(0):
+                frames[formatted_symbol] = data[formatted_symbol]
+    elif len(formatted_symbols) == 1:
+        frames[formatted_symbols[0]] = data
+    return frames
+
+def get_historical_data(symbol, timeframe, start_date=None, end_date=None):
+    """
+    Fetches historical market data from Yahoo Finance with flexible date ranges.
+    """
+    arrays = get_historical_arrays(symbol, timeframe, start_date, end_date)
+    if isinstance(arrays, dict) and "error" in arrays:
+        return arrays
+    return arrays_to_records(arrays)
+
+def iter_record_chunks(arrays, chunk_size=STREAM_CHUNK_BARS):
+    """
+    Yields the candle dicts in lists of at most chunk_size, converting one chunk at a time.
+    """
+    for start in range(0, len(arrays['time']), chunk_size):
+        yield arrays_to_records({name: values[start:start + chunk_size] for name, values in arrays.items()})
+
+def write_ndjson(symbol, timeframe, outfile, start_date=None, end_date=None, chunk_size=STREAM_CHUNK_BARS):
+    """
+    Writes one JSON candle per line, flushing after every chunk; an error is written as a single line.
+    """
+    arrays = get_historical_arrays(symbol, timeframe, start_date, end_date)
+    if isinstance(arrays, dict) and "error" in arrays:
+        outfile.write(json.dumps(arrays) + "\n")
+        outfile.flush()
+        return False
+    for chunk in iter_record_chunks(arrays, chunk_size):
+        outfile.write("".join(json.dumps(record) + "\n" for record in chunk))
+        outfile.flush()
+    return True
+
+def get_analysis(symbol, timeframe, start_date=None, end_date=None, params=None):
+    """
+    Runs the smart-money-concepts analysis on the fetched bars and returns its summary instead of the bars.
+    """
+    arrays = get_historical_arrays(symbol, timeframe, start_date, end_date)
+    if isinstance(arrays, dict) and "error" in arrays:
+        return arrays
+    return summarize(arrays, symbol, timeframe, params)
+
+def summarize(arrays, symbol, timeframe, params=None):
+    """
+    Runs the analysis on already fetched arrays, returning the summary or {"error": ...}.
+    """
     try:
-        data = yf.download(tickers=formatted_symbol, **params)
-        
-        if data.empty:
-            return {"error": f"No data found for symbol {formatted_symbol}. Check the symbol or adjust the date range."}
+        return dict(analyze(arrays, params), symbol=symbol, timeframe=timeframe)
+    except Exception as e:
+        return {"error": f"Analysis failed for symbol {symbol}: {str(e)}"}
 
-        data.reset_index(inplace=True)
-        
-        timestamp_col = 'Datetime' if 'Datetime' in data.columns else 'Date'
-        data.rename(columns={timestamp_col: 'date'}, inplace=True)
-        
-        # Standardize column names
-        data.rename(columns={
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }, inplace=True)
+def get_historical_arrays(symbol, timeframe, start_date=None, end_date=None):
+    """
+    Like get_historical_data, but returns column arrays instead of candle dicts.
+    """
+    formatted_symbol = format_symbol_for_yfinance(symbol)
 
-        # Ensure timestamps are in ISO 8601 format
-        data['date'] = pd.to_datetime(data['date']).dt.tz_localize(None).isoformat()
+    params = build_download_params(timeframe, start_date, end_date)
+    if params is None:
+        return {"error": f"Unsupported timeframe: {timeframe}. Please use a standard format (e.g., '1m', '1h', '1d')."}
+
+    try:
+        arrays = load_arrays([formatted_symbol], params).get(formatted_symbol)
+        
+        if arrays is None:
+            return {"error": f"No data found for symbol {formatted_symbol}. Check the symbol or adjust the date range."}
 
-        required_cols = ['date', 'open', 'high', 'low', 'close']
-        if 'volume' in data.columns:
-            required_cols.append('volume')
-            
-        return data[required_cols].to_dict('records')
+        return arrays
 
     except Exception as e:
         import traceback
         return {"error": f"An error occurred for symbol {formatted_symbol}: {str(e)}", "trace": traceback.format_exc()}
 
+def get_historical_batch(jobs, workers=BATCH_WORKERS):
+    """
+    Fetches many (symbol, timeframe, range) jobs at once.
+
+    Jobs are dicts with "symbol", "timeframe" and optional "start"/"end". Jobs that
+    share an interval and range are fetched in one multi-ticker download. The
+    groups run in a pool of at most `workers` threads, which overlaps cache
+    reads and encoding; the downloads themselves take turns on download_lock.
+    Returns one result per job, in order: the candle list, or {"error": ...}.
+    """
+    results = [None] * len(jobs)
+    groups = {}
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict) or not job.get('symbol') or not job.get('timeframe'):
+            results[index] = {"error": 'Each job needs a "symbol" and a "timeframe".'}
+            continue
+        params = build_download_params(job['timeframe'], job.get('start'), job.get('end'))
+        if params is None:
+            results[index] = {"error": f"Unsupported timeframe: {job['timeframe']}. Please use a standard format (e.g., '1m', '1h', '1d')."}
+            continue
+        key = tuple(sorted(params.items()))
+        groups.setdefault(key, []).append((index, format_symbol_for_yfinance(job['symbol'])))
+
+    def fetch_group(key, members):
+        formatted_symbols = sorted({formatted_symbol for _, formatted_symbol in members})
+        try:
+            arrays_by_symbol = load_arrays(formatted_symbols, dict(key), threads=min(len(formatted_symbols), workers))
+        except Exception as e:
+            for index, formatted_symbol in members:
+                results[index] = {"error": f"An error occurred for symbol {formatted_symbol}: {str(e)}"}
+            return
+        for index, formatted_symbol in members:
+            arrays = arrays_by_symbol.get(formatted_symbol)
+            if arrays is None:
+                results[index] = {"error": f"No data found for symbol {formatted_symbol}. Check the symbol or adjust the date range."}
+                continue
+            try:
+                results[index] = arrays_to_records(arrays)
+            except Exception as e:
+                results[index] = {"error": f"An error occurred for symbol {formatted_symbol}: {str(e)}"}
+
+    if groups:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups)))) as executor:
+            for future in [executor.submit(fetch_group, key, members) for key, members in groups.items()]:
+                future.result()
+    return results
+
+
+def handle_request(request, respond=None):
+    """
+    Answers one daemon request and echoes its "id" so responses can arrive out of order.
+
+    {"id": 1, "symbol": "EUR/USD", "timeframe": "1h", "start": ..., "end": ...} -> {"id": 1, "data": [...]}
+    With "stream": true the candles are sent through respond as {"id": 1, "data": [chunk], "more": true}
+    lines, and the returned response carries the last chunk with "more": false.
+    {"id": 2, "op": "batch", "jobs": [{"symbol": ..., "timeframe": ...}, ...]} -> {"id": 2, "results": [...]}
+    {"id": 3, "op": "analyze", "symbol": ..., "timeframe": ..., "params": {...}} -> {"id": 3, "summary": {...}}
+    With "candles": true the analyzed candles come back too, as "candles": [...], from the same download.
+    {"id": 4, "op": "ping"} -> {"id": 4, "ok": true}
+    Failures come back as {"id": ..., "error": "..."}.
+    """
+    if not isinstance(request, dict):
+        return {"error": "Each request must be a JSON object."}
+    response = {"id": request.get("id")}
+    op = request.get("op", "history")
+
+    if op == "ping":
+        response["ok"] = True
+    elif op == "batch":
+        jobs = request.get("jobs")
+        if not isinstance(jobs, list):
+            response["error"] = 'The "jobs" field must be a list.'
+        else:
+            response["results"] = get_historical_batch(jobs)
+    elif op == "analyze":
+        if not request.get("symbol") or not request.get("timeframe"):
+            response["error"] = 'The "symbol" and "timeframe" fields are required.'
+        else:
+            arrays = get_historical_arrays(request["symbol"], request["timeframe"], request.get("start"), request.get("end"))
+            summary = arrays if isinstance(arrays, dict) and "error" in arrays else summarize(
+                arrays, request["symbol"], request["timeframe"], request.get("params")
+            )
+            if "error" in summary:
+                response.update(summary)
+            else:
+                response["summary"] = summary
+                if request.get("candles"):
+                    response["candles"] = arrays_to_records(arrays)
+    elif op == "history":
+        if not request.get("symbol") or not request.get("timeframe"):
+            response["error"] = 'The "symbol" and "timeframe" fields are required.'
+        elif request.get("stream") and respond is not None:
+            arrays = get_historical_arrays(request["symbol"], request["timeframe"], request.get("start"), request.get("end"))
+            if isinstance(arrays, dict) and "error" in arrays:
+                response.update(arrays)
+            else:
+                chunk_size = int(request.get("chunk", STREAM_CHUNK_BARS))
+                previous = []
+                for chunk in iter_record_chunks(arrays, chunk_size):
+                    if previous:
+                        respond(dict(response, data=previous, more=True))
+                    previous = chunk
+                response.update(data=previous, more=False)
+        else:
+            data = get_historical_data(request["symbol"], request["timeframe"], request.get("start"), request.get("end"))
+            if isinstance(data, dict) and "error" in data:
+                response.update(data)
+            else:
+                response["data"] = data
+    else:
+        response["error"] = f"Unknown op: {op}"
+    return response
+
+def serve_lines(infile, outfile, workers=DAEMON_WORKERS):
+    """
+    Reads JSON-lines requests until EOF and writes one JSON line per response as each completes.
+    """
+    write_lock = threading.Lock()
+
+    def respond(response):
+        try:
+            line = json.dumps(response, default=str, allow_nan=False) + "\n"
+        except ValueError as e:
+            line = json.dumps({"id": response.get("id"), "error": f"Response could not be encoded: {str(e)}"}) + "\n"
+        with write_lock:
+            outfile.write(line)
+            outfile.flush()
+
+    def run(request):
+        try:
+            respond(handle_request(request, respond))
+        except Exception as e:
+            respond({"id": request.get("id") if isinstance(request, dict) else None, "error": str(e)})
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for line in infile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                respond({"id": None, "error": "Invalid JSON request."})
+                continue
+            executor.submit(run, request)
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        serve_lines(
+            (line.decode('utf-8') for line in self.rfile),
+            _SocketWriter(self.wfile)
+        )
+
+class _SocketWriter:
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode('utf-8'))
+
+    def flush(self):
+        self.wfile.flush()
+
+def serve_socket(path):
+    """
+    Serves the JSON-lines protocol on a Unix domain socket, one thread per connection.
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, _LineHandler) as server:
+        server.daemon_threads = True
+        server.serve_forever()
+
 
 if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == '--daemon':
+        # Long-running mode: JSON-lines on stdin/stdout, or on a Unix socket with --socket PATH
+        if len(sys.argv) == 4 and sys.argv[2] == '--socket':
+            serve_socket(sys.argv[3])
+        else:
+            serve_lines(sys.stdin, sys.stdout)
+        sys.exit(0)
+
+    if len(sys.argv) == 3 and sys.argv[1] == '--batch':
+        # Jobs as a JSON list, inline or read from stdin with '-'
+        try:
+            jobs = json.loads(sys.stdin.read() if sys.argv[2] == '-' else sys.argv[2])
+        except ValueError:
+            print(json.dumps({"error": "The --batch argument must be a JSON list of jobs."}))
+            sys.exit(1)
+        if not isinstance(jobs, list):
+            print(json.dumps({"error": "The --batch argument must be a JSON list of jobs."}))
+            sys.exit(1)
+        print(json.dumps(get_historical_batch(jobs), default=str))
+        sys.exit(0)
+
+    if len(sys.argv) in (4, 6) and sys.argv[3] == '--ndjson':
+        # Newline-delimited candles, streamed chunk by chunk; optional start and end dates
+        ok = write_ndjson(sys.argv[1], sys.argv[2], sys.stdout, *sys.argv[4:6])
+        sys.exit(0 if ok else 1)
+
+    if len(sys.argv) == 4 and sys.argv[3] == '--analyze':
+        print(json.dumps(get_analysis(sys.argv[1], sys.argv[2])))
+        sys.exit(0)
+
     if len(sys.argv) != 3:
-        print(json.dumps({"error": "Invalid arguments. Usage: python data_connector.py <symbol> <timeframe>"}))
+        print(json.dumps({"error": "Invalid arguments. Usage: python data_connector.py <symbol> <timeframe> [--ndjson [START END] | --analyze] | --batch JOBS | --daemon [--socket PATH]"}))
         sys.exit(1)
 
     symbol_arg = sys.argv[1]
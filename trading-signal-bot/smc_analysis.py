@@ -0,0 +1,291 @@
+"""
+Vectorized smart-money-concepts analysis over data_connector column arrays.
+
+analyze() takes the arrays returned by data_connector.get_historical_arrays
+(chronological, 'time' as epoch seconds) and returns a compact summary:
+market structure breaks, active order blocks, fair value gaps, equal
+highs/lows, the premium/discount zone, ATR and support/resistance levels,
+plus the confirmation names used by ProfessionalSMCEngine in
+src/SmartMoneyAnalyzer.js. confirmation_bias maps each confirmation to the
+side it supports ('bullish', 'bearish' or 'neutral' for either), so the
+engine only counts those that agree with its signal direction.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_PARAMS = {
+    'swing_length': 50,      # Bars on each side of a swing pivot
+    'internal_length': 5,    # Bars on each side of an internal pivot
+    'equal_length': 3,       # Bars on each side of pivots compared for equal highs/lows
+    'equal_threshold': 0.1,  # Max difference between equal highs/lows, in ATRs
+    'atr_period': 14,
+    'zone_lookback': 100,    # Bars spanning the premium/discount range
+    'recent_bars': 5,        # How recent a break must be to count as a confirmation
+    'max_items': 3,          # Order blocks, gaps and levels reported per side
+    'level_tolerance': 0.25, # Width in ATRs within which swing levels are clustered into S/R
+}
+
+
+def format_time(seconds):
+    return pd.Timestamp(int(seconds), unit='s').strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def true_range(high, low, close):
+    prev_close = np.r_[close[:1], close[:-1]]
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, period):
+    """Simple moving average of the true range; NaN until `period` ranges exist."""
+    tr = true_range(high, low, close)
+    result = np.full(len(tr), np.nan)
+    if len(tr) >= period:
+        sums = np.cumsum(np.r_[0.0, tr])
+        result[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return result
+
+
+def pivots(values, length, kind):
+    """Indices of bars strictly above (kind='high') or below (kind='low') the `length` bars on each side."""
+    n = len(values)
+    if n < 2 * length + 1:
+        return np.empty(0, dtype=np.int64)
+    windows = sliding_window_view(values, length)
+    side = windows.max(axis=1) if kind == 'high' else windows.min(axis=1)
+    center = np.arange(length, n - length)
+    left, right = side[center - length], side[center + 1]
+    mask = (values[center] > left) & (values[center] > right) if kind == 'high' else \
+        (values[center] < left) & (values[center] < right)
+    return center[mask]
+
+
+def suffix_extremes(high, low):
+    """Highest high and lowest low from each bar to the end."""
+    return np.maximum.accumulate(high[::-1])[::-1], np.minimum.accumulate(low[::-1])[::-1]
+
+
+def first_crossings(close, pivot_idx, levels, length, above):
+    """For each pivot, the first bar after it is confirmed whose close crosses its level, or -1.
+
+    A level stays live only until the next pivot of the same kind is confirmed,
+    so each bar is scanned at most once per kind.
+    """
+    confirmed = pivot_idx + length
+    ends = np.r_[confirmed[1:], len(close)]
+    result = np.full(len(pivot_idx), -1, dtype=np.int64)
+    for k, (start, end, level) in enumerate(zip(confirmed, ends, levels)):
+        segment = close[start:end]
+        hits = np.flatnonzero(segment > level if above else segment < level)
+        if len(hits):
+            result[k] = start + hits[0]
+    return result
+
+
+def structure_breaks(high, low, close, length):
+    """BOS/CHoCH events for pivots of the given length, in bar order.
+
+    A break in the direction of the prevailing bias is a BOS, one against it a
+    CHoCH. Each event records the pivot, the break bar and the broken level.
+    """
+    events = []
+    for kind, values, above in (('high', high, True), ('low', low, False)):
+        idx = pivots(values, length, kind)
+        crossings = first_crossings(close, idx, values[idx], length, above)
+        for pivot, crossing in zip(idx, crossings):
+            if crossing >= 0:
+                events.append((int(crossing), 'bullish' if above else 'bearish', int(pivot), float(values[pivot])))
+    events.sort()
+
+    bias = 0
+    breaks = []
+    for index, direction, pivot, level in events:
+        sign = 1 if direction == 'bullish' else -1
+        tag = 'CHoCH' if bias == -sign else 'BOS'
+        bias = sign
+        breaks.append({'index': index, 'direction': direction, 'type': tag, 'pivot': pivot, 'level': level})
+    return breaks, bias
+
+
+def order_blocks(high, low, breaks, suffix_high, suffix_low):
+    """Order block per break: the extreme candle between the pivot and the break, kept while unmitigated.
+
+    A bullish block is mitigated once price trades below its low, a bearish one above its high.
+    """
+    blocks = []
+    n = len(high)
+    for event in breaks:
+        start, end = event['pivot'], event['index']
+        if end <= start:
+            continue
+        if event['direction'] == 'bullish':
+            origin = start + int(np.argmin(low[start:end]))
+            mitigated = end + 1 < n and suffix_low[end + 1] < low[origin]
+        else:
+            origin = start + int(np.argmax(high[start:end]))
+            mitigated = end + 1 < n and suffix_high[end + 1] > high[origin]
+        if not mitigated:
+            blocks.append({'index': origin, 'direction': event['direction'], 'top': float(high[origin]), 'bottom': float(low[origin])})
+    return blocks
+
+
+def fair_value_gaps(high, low, close, suffix_high, suffix_low):
+    """Unfilled three-candle gaps, as index arrays for bullish and bearish gaps."""
+    if len(high) < 3:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    i = np.arange(2, len(high))
+    # Bars after the gap; the last bar has none, so it cannot have been filled yet
+    after_low = np.r_[suffix_low[3:], np.inf]
+    after_high = np.r_[suffix_high[3:], -np.inf]
+    bullish = (low[i] > high[i - 2]) & (close[i - 1] > high[i - 2]) & (after_low > high[i - 2])
+    bearish = (high[i] < low[i - 2]) & (close[i - 1] < low[i - 2]) & (after_high < low[i - 2])
+    return i[bullish], i[bearish]
+
+
+def equal_levels(values, close, atr_values, length, threshold, kind):
+    """Consecutive pivots within `threshold` ATRs of each other, with the bar that broke them (-1 if intact)."""
+    idx = pivots(values, length, kind)
+    if len(idx) < 2:
+        return []
+    first, second = idx[:-1], idx[1:]
+    tolerance = threshold * atr_values[second]
+    equal = np.abs(values[second] - values[first]) < np.nan_to_num(tolerance, nan=0.0)
+    levels = []
+    for a, b in zip(first[equal], second[equal]):
+        level = max(values[a], values[b]) if kind == 'high' else min(values[a], values[b])
+        after = close[b + length:]
+        hits = np.flatnonzero(after > level if kind == 'high' else after < level)
+        levels.append({'index': int(b), 'level': float(level), 'broken': int(b + length + hits[0]) if len(hits) else -1})
+    return levels
+
+
+def support_resistance(levels, touches_min, tolerance):
+    """Clusters swing levels lying within `tolerance` of their neighbours; returns (level, touches) pairs."""
+    if not len(levels) or not tolerance > 0:
+        return []
+    ordered = np.sort(levels)
+    groups = np.r_[0, np.cumsum(np.diff(ordered) > tolerance)]
+    counts = np.bincount(groups)
+    means = np.bincount(groups, weights=ordered) / counts
+    keep = counts >= touches_min
+    return list(zip(means[keep].tolist(), counts[keep].tolist()))
+
+
+def premium_discount(high, low, close, lookback):
+    top = float(np.max(high[-lookback:]))
+    bottom = float(np.min(low[-lookback:]))
+    position = (close[-1] - bottom) / (top - bottom) if top > bottom else 0.5
+    if position > 0.525:
+        zone = 'premium'
+    elif position < 0.475:
+        zone = 'discount'
+    else:
+        zone = 'equilibrium'
+    return {'zone': zone, 'position': float(position), 'top': top, 'bottom': bottom, 'equilibrium': (top + bottom) / 2}
+
+
+def analyze(arrays, params=None):
+    """Compact SMC summary of chronological OHLC arrays; see the module docstring."""
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    times = arrays['time']
+    high = np.asarray(arrays['high'], dtype=np.float64)
+    low = np.asarray(arrays['low'], dtype=np.float64)
+    close = np.asarray(arrays['close'], dtype=np.float64)
+    # Rows with missing prices would poison the running extremes
+    valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+    times, high, low, close = times[valid], high[valid], low[valid], close[valid]
+    volume = np.asarray(arrays['volume'], dtype=np.float64)[valid] if 'volume' in arrays else None
+    n = len(close)
+    if n < 3:
+        return {"error": f"Not enough bars for analysis ({n})."}
+
+    price = float(close[-1])
+    atr_values = atr(high, low, close, p['atr_period'])
+    current_atr = float(atr_values[-1]) if not np.isnan(atr_values[-1]) else float(np.mean(high - low))
+    suffix_high, suffix_low = suffix_extremes(high, low)
+    recent_from = n - p['recent_bars']
+    confirmations = []
+    bias_of = {}
+
+    def confirm(name, bias):
+        confirmations.append(name)
+        bias_of[name] = bias
+
+    # Market structure
+    structure = {}
+    blocks = {}
+    for name, length in (('swing', p['swing_length']), ('internal', p['internal_length'])):
+        breaks, bias = structure_breaks(high, low, close, length)
+        structure[name] = {
+            'bias': {1: 'bullish', -1: 'bearish'}.get(bias, 'neutral'),
+            'last_break': dict(breaks[-1], time=format_time(times[breaks[-1]['index']])) if breaks else None,
+        }
+        for event in breaks:
+            if event['index'] >= recent_from:
+                confirm(f"{name}{event['direction'].capitalize()}{event['type']}", event['direction'])
+        blocks[name] = order_blocks(high, low, breaks, suffix_high, suffix_low)
+        # Price inside blocks of both directions supports neither side
+        respected = {block['direction'] for block in blocks[name] if block['bottom'] <= price <= block['top']}
+        if len(respected) == 1:
+            confirm(f'{name}OrderBlockRespect', respected.pop())
+
+    # Fair value gaps
+    bullish_gaps, bearish_gaps = fair_value_gaps(high, low, close, suffix_high, suffix_low)
+    gaps = (
+        [{'index': int(i), 'direction': 'bullish', 'top': float(low[i]), 'bottom': float(high[i - 2])} for i in bullish_gaps[-p['max_items']:]] +
+        [{'index': int(i), 'direction': 'bearish', 'top': float(low[i - 2]), 'bottom': float(high[i])} for i in bearish_gaps[-p['max_items']:]]
+    )
+    if len(bullish_gaps) and bullish_gaps[-1] >= recent_from:
+        confirm('bullishFairValueGap', 'bullish')
+    if len(bearish_gaps) and bearish_gaps[-1] >= recent_from:
+        confirm('bearishFairValueGap', 'bearish')
+
+    # Equal highs and lows
+    equal_highs = equal_levels(high, close, atr_values, p['equal_length'], p['equal_threshold'], 'high')
+    equal_lows = equal_levels(low, close, atr_values, p['equal_length'], p['equal_threshold'], 'low')
+    if any(level['broken'] >= recent_from for level in equal_highs):
+        confirm('equalHighsBreak', 'bullish')
+    if any(level['broken'] >= recent_from for level in equal_lows):
+        confirm('equalLowsBreak', 'bearish')
+
+    # Premium / discount
+    # Selling from premium and buying from discount; equilibrium favours neither
+    zone = premium_discount(high, low, close, min(p['zone_lookback'], n))
+    if zone['zone'] == 'premium':
+        confirm('premiumZoneEntry', 'bearish')
+    elif zone['zone'] == 'discount':
+        confirm('discountZoneEntry', 'bullish')
+
+    # Volatility and volume
+    long_atr = atr(high, low, close, min(200, n - 1))[-1]
+    if not np.isnan(long_atr) and current_atr >= long_atr:
+        confirm('atrVolatilityFilter', 'neutral')
+    if volume is not None and n > 20 and np.nanmean(volume[-21:-1]) > 0 and volume[-1] > 1.5 * np.nanmean(volume[-21:-1]):
+        confirm('volumeConfirmation', 'neutral')
+
+    # Support / resistance from internal swing levels
+    swing_levels = np.r_[high[pivots(high, p['internal_length'], 'high')], low[pivots(low, p['internal_length'], 'low')]]
+    levels = support_resistance(swing_levels, 2, p['level_tolerance'] * current_atr)
+    support = sorted((l for l in levels if l[0] < price), key=lambda l: price - l[0])[:p['max_items']]
+    resistance = sorted((l for l in levels if l[0] >= price), key=lambda l: l[0] - price)[:p['max_items']]
+
+    def with_time(items):
+        return [dict(item, time=format_time(times[item['index']])) for item in items]
+
+    return {
+        'time': format_time(times[-1]),
+        'price': price,
+        'bars': n,
+        'atr': current_atr,
+        'structure': structure,
+        'order_blocks': {name: with_time(items[-p['max_items']:]) for name, items in blocks.items()},
+        'fair_value_gaps': with_time(gaps),
+        'equal_highs': with_time([level for level in equal_highs if level['broken'] < 0][-p['max_items']:]),
+        'equal_lows': with_time([level for level in equal_lows if level['broken'] < 0][-p['max_items']:]),
+        'zone': zone,
+        'support': [{'level': level, 'touches': touches} for level, touches in support],
+        'resistance': [{'level': level, 'touches': touches} for level, touches in resistance],
+        'confirmations': confirmations,
+        'confirmation_bias': bias_of,
+    }
@@ -1,4 +1,5 @@
 const { spawn } = require('child_process');
+const readline = require('readline');
 
 // =================================================================
 // ENHANCED RISK REWARD CALCULATION - Multiple target system
@@ -293,6 +294,7 @@ class ProfessionalSMCEngine {
         this.fairValueGaps = new Map();
         this.equalHighs = new Map();
         this.equalLows = new Map();
+        this.vectorSummaries = new Map();
         this.lastSignalTime = new Map();
         
         this.activePositions = new Map();
@@ -398,24 +400,24 @@ class ProfessionalSMCEngine {
         confirmations.push(...internalAnalysis.confirmations);
         if (!primaryBrokenLevel && internalAnalysis.brokenLevel) primaryBrokenLevel = internalAnalysis.brokenLevel;
         
-        // ... other analyses (Order Blocks, FVG, etc.)
-        const orderBlockAnalysis = this.analyzeOrderBlocks(symbol, priceHistory, currentPrice);
-        confirmations.push(...orderBlockAnalysis.confirmations);
-        const fvgAnalysis = this.analyzeFairValueGaps(symbol, priceHistory, currentPrice);
-        confirmations.push(...fvgAnalysis.confirmations);
-        const eqhlAnalysis = this.analyzeEqualHighsLows(symbol, priceHistory, currentPrice);
-        confirmations.push(...eqhlAnalysis.confirmations);
-        const zoneAnalysis = this.analyzePremiumDiscountZones(symbol, priceHistory, currentPrice);
-        confirmations.push(...zoneAnalysis.confirmations);
-        const additionalConfluences = this.analyzeAdditionalFactors(symbol, priceHistory, currentPrice);
-        confirmations.push(...additionalConfluences.confirmations);
-
         let signalDirection = null;
         if (swingAnalysis.alerts.swingBullishBOS || swingAnalysis.alerts.swingBullishCHoCH || internalAnalysis.alerts.internalBullishBOS || internalAnalysis.alerts.internalBullishCHoCH) {
             signalDirection = 'BUY';
         } else if (swingAnalysis.alerts.swingBearishBOS || swingAnalysis.alerts.swingBearishCHoCH || internalAnalysis.alerts.internalBearishBOS || internalAnalysis.alerts.internalBearishCHoCH) {
             signalDirection = 'SELL';
         }
+
+        // ... other analyses (Order Blocks, FVG, etc.), counted only when they agree with the direction
+        const orderBlockAnalysis = this.analyzeOrderBlocks(symbol, priceHistory, currentPrice, signalDirection);
+        confirmations.push(...orderBlockAnalysis.confirmations);
+        const fvgAnalysis = this.analyzeFairValueGaps(symbol, priceHistory, currentPrice, signalDirection);
+        confirmations.push(...fvgAnalysis.confirmations);
+        const eqhlAnalysis = this.analyzeEqualHighsLows(symbol, priceHistory, currentPrice, signalDirection);
+        confirmations.push(...eqhlAnalysis.confirmations);
+        const zoneAnalysis = this.analyzePremiumDiscountZones(symbol, priceHistory, currentPrice, signalDirection);
+        confirmations.push(...zoneAnalysis.confirmations);
+        const additionalConfluences = this.analyzeAdditionalFactors(symbol, priceHistory, currentPrice, signalDirection);
+        confirmations.push(...additionalConfluences.confirmations);
         
         return {
             signalDirection,
@@ -512,11 +514,38 @@ class ProfessionalSMCEngine {
         return { alerts, confirmations, brokenLevel };
     }
 
-    analyzeOrderBlocks(symbol, priceHistory, currentPrice) { return { confirmations: [] }; }
-    analyzeFairValueGaps(symbol, priceHistory, currentPrice) { return { confirmations: [] }; }
-    analyzeEqualHighsLows(symbol, priceHistory, currentPrice) { return { confirmations: [] }; }
-    analyzePremiumDiscountZones(symbol, priceHistory, currentPrice) { return { confirmations: [] }; }
-    analyzeAdditionalFactors(symbol, priceHistory, currentPrice) { return { confirmations: [] }; }
+    // These read the summary computed by smc_analysis.py (see setVectorSummary);
+    // without one, or without a signal direction, they contribute no confirmations.
+    analyzeOrderBlocks(symbol, priceHistory, currentPrice, signalDirection) {
+        return { confirmations: this.summaryConfirmations(symbol, ['swingOrderBlockRespect', 'internalOrderBlockRespect'], signalDirection) };
+    }
+    analyzeFairValueGaps(symbol, priceHistory, currentPrice, signalDirection) {
+        return { confirmations: this.summaryConfirmations(symbol, ['bullishFairValueGap', 'bearishFairValueGap'], signalDirection) };
+    }
+    analyzeEqualHighsLows(symbol, priceHistory, currentPrice, signalDirection) {
+        return { confirmations: this.summaryConfirmations(symbol, ['equalHighsBreak', 'equalLowsBreak'], signalDirection) };
+    }
+    analyzePremiumDiscountZones(symbol, priceHistory, currentPrice, signalDirection) {
+        return { confirmations: this.summaryConfirmations(symbol, ['premiumZoneEntry', 'discountZoneEntry'], signalDirection) };
+    }
+    analyzeAdditionalFactors(symbol, priceHistory, currentPrice, signalDirection) {
+        return { confirmations: this.summaryConfirmations(symbol, ['volumeConfirmation', 'atrVolatilityFilter'], signalDirection) };
+    }
+
+    setVectorSummary(symbol, summary) {
+        if (summary) this.vectorSummaries.set(symbol, summary);
+        else this.vectorSummaries.delete(symbol);
+    }
+
+    // Keeps the named confirmations that support signalDirection: bullish ones for
+    // BUY, bearish ones for SELL, and neutral ones (volume, volatility) for either.
+    summaryConfirmations(symbol, names, signalDirection) {
+        const summary = this.vectorSummaries.get(symbol);
+        if (!summary || !signalDirection) return [];
+        const side = signalDirection === 'BUY' ? 'bullish' : 'bearish';
+        const bias = summary.confirmation_bias || {};
+        return summary.confirmations.filter(c => names.includes(c) && (bias[c] === side || bias[c] === 'neutral'));
+    }
 
     calculateConfidence(confirmations) {
         let totalScore = 0;
@@ -665,6 +694,114 @@ class ProfessionalSMCEngine {
 }
 
 
+/**
+ * Keeps one warm `data_connector.py --daemon` process and multiplexes
+ * JSON-lines requests over its stdin/stdout, matching responses by id.
+ * The process is respawned on the next request if it exits.
+ */
+class DataConnectorDaemon {
+  /**
+   * timeoutMs bounds how long a request may go without a response (for
+   * streamed history, between chunks) before its promise is rejected.
+   */
+  constructor(script = './data_connector.py', timeoutMs = 60000) {
+    this.script = script;
+    this.timeoutMs = timeoutMs;
+    this.process = null;
+    this.pending = new Map();
+    this.nextId = 1;
+  }
+
+  start() {
+    if (this.process) return;
+    const child = spawn('python3', [this.script, '--daemon']);
+    this.process = child;
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (e) {
+        console.error('❌ Unparseable data connector response:', line.slice(0, 200));
+        // Fail the request the line was meant for, if its id survived
+        const match = /"id":\s*(\d+)/.exec(line);
+        const request = match && this.pending.get(Number(match[1]));
+        if (request) {
+          this.pending.delete(Number(match[1]));
+          request.reject(new Error('Unparseable data connector response.'));
+        }
+        return;
+      }
+      const request = this.pending.get(response.id);
+      if (!request) return;
+      if (response.more) {
+        // A streamed chunk; hand it over now and keep waiting for the last one
+        request.armTimeout();
+        request.onChunk(response.data);
+        return;
+      }
+      this.pending.delete(response.id);
+      if (response.error) {
+        request.reject(new Error(response.error));
+      } else {
+        if (response.data && request.streamed) request.onChunk(response.data);
+        // History resolves with its candles; other ops with the whole response
+        request.resolve(request.streamed ? request.chunks : ('data' in response ? response.data : response));
+      }
+    });
+
+    let stderr = '';
+    child.stderr.on('data', (chunk) => {
+      stderr = (stderr + chunk.toString()).slice(-2000);
+    });
+
+    const fail = (message) => {
+      if (this.process !== child) return;
+      this.process = null;
+      for (const request of this.pending.values()) {
+        request.reject(new Error(message));
+      }
+      this.pending.clear();
+    };
+    child.on('error', (error) => fail(`Data connector failed to start: ${error.message}`));
+    child.on('close', (code) => fail(`Data connector exited with code ${code}: ${stderr}`));
+  }
+
+  /**
+   * Sends one request. With onChunk, history is streamed: onChunk receives each
+   * chunk of candles as it arrives and the promise resolves with the number of
+   * candles, so the full history never has to be held at once.
+   */
+  request(payload, onChunk = null) {
+    this.start();
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      let timer = null;
+      const request = {
+        resolve: (value) => { clearTimeout(timer); resolve(value); },
+        reject: (error) => { clearTimeout(timer); reject(error); },
+        streamed: Boolean(onChunk),
+        chunks: 0,
+      };
+      request.armTimeout = () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+          if (this.pending.get(id) !== request) return;
+          this.pending.delete(id);
+          reject(new Error(`Data connector request timed out after ${this.timeoutMs}ms`));
+        }, this.timeoutMs);
+      };
+      request.armTimeout();
+      request.onChunk = (chunk) => {
+        request.chunks += chunk.length;
+        if (onChunk) onChunk(chunk);
+      };
+      this.pending.set(id, request);
+      this.process.stdin.write(JSON.stringify({ ...payload, id, stream: Boolean(onChunk) }) + '\n');
+    });
+  }
+}
+
 /**
  * Smart Money Concepts Analyzer
  * Integrates the professional trading engine to provide advanced signals.
@@ -672,13 +809,15 @@ class ProfessionalSMCEngine {
 class SmartMoneyAnalyzer {
   constructor() {
     this.smcEngine = new ProfessionalSMCEngine();
+    this.dataConnector = new DataConnectorDaemon();
     console.log(`🧠 Smart Money Analyzer initialized with Professional Engine and MetaTrader 5 connector`);
   }
 
   async analyzeSymbol(symbol, timeframe, apiKey) {
     try {
       console.log(`📊 Starting analysis for ${symbol} on ${timeframe}`);
-      const historicalData = await this.fetchHistoricalData(symbol, timeframe, apiKey);
+      const { historicalData, summary } = await this.fetchHistoryWithSummary(symbol, timeframe, apiKey);
+      this.smcEngine.setVectorSummary(symbol, summary);
       
       if (!historicalData || historicalData.length < this.smcEngine.signalRequirements.minHistoryBars) {
         throw new Error(`Insufficient data for analysis. Need at least ${this.smcEngine.signalRequirements.minHistoryBars} candles, got ${historicalData?.length || 0}`);
@@ -713,37 +852,27 @@ class SmartMoneyAnalyzer {
   }
 
   async fetchHistoricalData(symbol, timeframe) {
-    return new Promise((resolve, reject) => {
-      const pythonProcess = spawn('python3', ['./data_connector.py', symbol, timeframe]);
-      
-      let data = '';
-      pythonProcess.stdout.on('data', (chunk) => {
-        data += chunk.toString();
-      });
-
-      let error = '';
-      pythonProcess.stderr.on('data', (chunk) => {
-        error += chunk.toString();
-      });
-
-      pythonProcess.on('close', (code) => {
-        if (code !== 0) {
-          return reject(new Error(`Python script exited with code ${code}: ${error}`));
-        }
-        try {
-          const result = JSON.parse(data);
-          if (result.error) {
-            return reject(new Error(result.error));
-          }
-          // The Python script already sorts data with the most recent first
-          const sortedData = result.sort((a, b) => new Date(b.date) - new Date(a.date));
-          console.log(`✅ Successfully fetched ${sortedData.length} candles from yfinance`);
-          resolve(sortedData);
-        } catch (e) {
-          reject(new Error('Failed to parse JSON from Python script.'));
-        }
-      });
-    });
+    const result = await this.dataConnector.request({ symbol, timeframe });
+    return this.sortCandles(result);
+  }
+
+  // The candles plus the order blocks, FVGs, equal highs/lows and zones computed
+  // in Python from the same download; falls back to plain history without them
+  async fetchHistoryWithSummary(symbol, timeframe, apiKey) {
+    try {
+      const response = await this.dataConnector.request({ op: 'analyze', symbol, timeframe, candles: true });
+      return { historicalData: this.sortCandles(response.candles), summary: response.summary };
+    } catch (error) {
+      console.error(`⚠️ Vector analysis unavailable for ${symbol}:`, error.message);
+      return { historicalData: await this.fetchHistoricalData(symbol, timeframe, apiKey), summary: null };
+    }
+  }
+
+  sortCandles(candles) {
+    // The Python script already sorts data with the most recent first
+    const sortedData = candles.sort((a, b) => new Date(b.date) - new Date(a.date));
+    console.log(`✅ Successfully fetched ${sortedData.length} candles from yfinance`);
+    return sortedData;
   }
 
   getStatus() {